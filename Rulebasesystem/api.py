@@ -1,16 +1,217 @@
 import sys
 import os
+import time
+IMPORT_STARTED = time.perf_counter()  # reported as the import phase of startup
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI
+import asyncio
+import hashlib
+import json
+import logging
+import re
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Tuple
+from fastapi import FastAPI, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-import traceback
-from src.dungeon_lsystem import DungeonLSystem
-from src.dungeon_visualizer import DungeonVisualizer
-from src.dungeon_grammar import DungeonGrammar
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from fastapi.routing import APIRoute
+from src.dungeon_cache import LRUCache
+from src.dungeon_executor import GenerationExecutor, ExecutorBusy, GenerationTimeout
+from src.dungeon_pipeline import (generate_body, generate_distances, generate_session, generate_ndjson, new_seed,
+                                  build_response_body, negotiate_encoding, compress_body, GENERATOR_VERSION)
+from src.dungeon_pool import WarmPool
+from src.dungeon_log import configure_logging, log_event
+from src.dungeon_metrics import MetricsRegistry, collect_stages
+from src.dungeon_snapshot import SNAPSHOT_PATH, SnapshotError, install_snapshot, load_snapshot
+from src.dungeon_warmup import warm_up
+# chunks, rerolls, tiles and the shared store are imported where they are first
+# used; warm-up loads them before the first request
 
-app = FastAPI()
+DEFAULT_ITERATIONS = 3
+DEFAULT_CELL_SIZE = 50
+MAX_TARGET_ROOMS = 5000
+MAX_BATCH_COUNT = 50
+
+# dungeons per executor call in batch requests; small so the first ones stream out early
+BATCH_SLICE = int(os.environ.get("DUNGEON_BATCH_SLICE", "2"))
+
+logger = configure_logging()
+
+# compiled rules from the prebuilt snapshot (see snapshot.py); compiled on first use without it
+SNAPSHOT_FILE = os.environ.get("DUNGEON_SNAPSHOT", SNAPSHOT_PATH)
+snapshot = None
+if SNAPSHOT_FILE:
+    try:
+        snapshot = load_snapshot(SNAPSHOT_FILE)
+        install_snapshot(snapshot)
+    except SnapshotError as e:
+        log_event(logger, logging.WARNING, "rule snapshot not loaded", reason=str(e))
+
+# run every hot path in this process and each executor worker before serving
+WARMUP = os.environ.get("DUNGEON_WARMUP", "1") not in ("0", "false", "no")
+# rounds of warm-up calls sent to process workers before giving up on reaching all of them
+WARMUP_ROUNDS = 3
+
+# generation runs on a bounded pool so one large dungeon cannot stall the event loop
+executor = GenerationExecutor(
+    mode=os.environ.get("DUNGEON_EXECUTOR", "thread"),
+    workers=int(os.environ.get("DUNGEON_WORKERS", "0")) or None,
+    max_queue=int(os.environ.get("DUNGEON_MAX_QUEUE", "32")),
+    timeout=float(os.environ.get("DUNGEON_TIMEOUT", "30"))
+)
+
+# Metrics, rendered by /metrics in the Prometheus text format
+metrics = MetricsRegistry()
+request_seconds = metrics.histogram(
+    "dungeon_request_duration_seconds", "Whole request latency", ("endpoint", "status"))
+requests_in_flight = metrics.gauge("dungeon_requests_in_flight", "Requests being handled")
+stage_seconds = metrics.histogram(
+    "dungeon_stage_duration_seconds", "Time spent in each generation stage", ("stage",))
+generations_total = metrics.counter("dungeon_generations_total", "Generations run on the executor")
+rooms_total = metrics.counter("dungeon_rooms_generated_total", "Rooms generated")
+last_rooms = metrics.gauge("dungeon_last_room_count", "Rooms generated by the latest executor call")
+svg_bytes_total = metrics.counter("dungeon_svg_bytes_total", "SVG bytes rendered")
+last_svg_bytes = metrics.gauge("dungeon_last_svg_bytes", "SVG bytes rendered by the latest executor call")
+errors_total = metrics.counter("dungeon_errors_total", "Failed requests by cause", ("kind",))
+startup_seconds = metrics.gauge("dungeon_startup_seconds", "Seconds spent in each startup phase", ("phase",))
+first_request_seconds = metrics.gauge(
+    "dungeon_first_request_seconds", "Latency of the first request to each endpoint", ("endpoint",))
+
+# startup report for /api/startup-stats; "ready" gates /api/ready
+startup = {
+    "ready": False,
+    "snapshot": "loaded" if snapshot is not None else ("disabled" if not SNAPSHOT_FILE else "compiled"),
+    "importSeconds": None,
+    "warmupSeconds": None,
+    "workers": executor.workers,
+    "workersWarmed": 0,
+    "warmupError": None,
+    "warmupPaths": {},
+    "goldenMismatches": []
+}
+first_requests = {}
+
+async def run_generation(fn, *args):
+    """executor.run with the worker's stage timings fed into the metrics"""
+    result, record = await executor.run(collect_stages, fn, *args)
+    for name, seconds in record["stages"].items():
+        stage_seconds.observe(seconds, stage=name)
+    values = record["values"]
+    generations_total.inc()
+    if "rooms" in values:
+        rooms_total.inc(values["rooms"])
+        last_rooms.set(values["rooms"])
+    if "svg_bytes" in values:
+        svg_bytes_total.inc(values["svg_bytes"])
+        last_svg_bytes.set(values["svg_bytes"])
+    log_event(logger, logging.DEBUG, "generation finished", function=fn.__name__, **record)
+    return result
+
+# ready-made dungeons for the plain "Generate Dungeon" request
+warm_pool = WarmPool(
+    lambda: run_generation(generate_body, new_seed(), DEFAULT_ITERATIONS, DEFAULT_CELL_SIZE),
+    size=int(os.environ.get("DUNGEON_POOL_SIZE", "0")),
+    refill_concurrency=int(os.environ.get("DUNGEON_POOL_REFILL_CONCURRENCY", "1"))
+)
+
+async def warm_up_workers() -> None:
+    """Run warm_up in this process and every executor worker"""
+    results = []
+    try:
+        if executor.mode == "process":
+            # a round of one call per worker can put two calls on the same process,
+            # so later rounds go after the workers not reached yet
+            worker_pids = set()
+            for _ in range(WARMUP_ROUNDS):
+                calls = executor.workers - len(worker_pids)
+                if calls <= 0:
+                    break
+                round_results = await asyncio.gather(*(executor.run(warm_up, snapshot) for _ in range(calls)))
+                results.extend(round_results)
+                worker_pids.update(result["pid"] for result in round_results)
+            if len(worker_pids) < executor.workers:
+                log_event(logger, logging.WARNING, "warm-up did not reach every worker",
+                          workers=executor.workers, warmed=len(worker_pids))
+            # sessions, rerolls and tiles are served from this process
+            results.append(warm_up(snapshot))
+            warmed = len(worker_pids)
+        else:
+            # thread and inline workers share this process, so one call warms them all
+            results.append(await executor.run(warm_up, snapshot))
+            warmed = executor.workers
+    except Exception as e:
+        log_event(logger, logging.WARNING, "warm-up failed", exc_info=True, error=str(e))
+        startup["warmupError"] = str(e) or type(e).__name__
+        warmed = 0
+
+    paths = {}
+    for result in results:
+        for name, seconds in result["seconds"].items():
+            paths[name] = max(paths.get(name, 0.0), seconds)
+    mismatches = {tuple(case) for result in results for case in result["mismatches"]}
+    startup.update(workersWarmed=warmed, warmupPaths=paths,
+                   goldenMismatches=[list(case) for case in sorted(mismatches, key=repr)])
+    if mismatches:
+        # the shared store and ETags assume every worker produces the same bytes per seed
+        log_event(logger, logging.ERROR, "seeded output differs from the rule snapshot",
+                  cases=startup["goldenMismatches"])
+
+async def warm_up_http(app: FastAPI) -> None:
+    """Send one request to every API route before serving.
+
+    The middleware stack is built, its async backend imported and each route
+    set up on first use, which otherwise lands on the first requests. Path
+    parameters are zeros, so most of these are cheap 404s; generation routes
+    make one small dungeon. The `warmup` scope key keeps them out of the metrics.
+    """
+    async def request(method: str, path: str) -> None:
+        # an empty body, then a disconnect once the response is complete (streaming responses listen for it)
+        messages = [{"type": "http.request", "body": b"", "more_body": False}]
+        finished = asyncio.Event()
+
+        async def receive():
+            if messages:
+                return messages.pop()
+            await finished.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                finished.set()
+
+        scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": method,
+                 "scheme": "http", "path": path, "raw_path": path.encode(), "query_string": b"iterations=1&count=1",
+                 "root_path": "", "headers": [(b"accept-encoding", b"gzip")], "client": ("127.0.0.1", 0),
+                 "server": ("127.0.0.1", 0), "warmup": True}
+        await app(scope, receive, send)
+
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            path = re.sub(r"\{\w+\}", "0", route.path)
+            try:
+                await request(sorted(route.methods)[0], path)
+            except Exception as e:
+                log_event(logger, logging.WARNING, "warm-up request failed", path=path, error=str(e))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # uvicorn only accepts connections once this returns, so no request sees a cold worker
+    if WARMUP:
+        start = time.perf_counter()
+        await warm_up_workers()
+        await warm_up_http(app)
+        startup["warmupSeconds"] = time.perf_counter() - start
+        startup_seconds.set(startup["warmupSeconds"], phase="warmup")
+    startup["ready"] = not startup["goldenMismatches"] and startup["warmupError"] is None
+    log_event(logger, logging.INFO, "startup finished", importSeconds=startup["importSeconds"],
+              warmupSeconds=startup["warmupSeconds"], workersWarmed=startup["workersWarmed"],
+              snapshot=startup["snapshot"])
+    warm_pool.start()
+    yield
+    await warm_pool.stop()
+    executor.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,54 +221,482 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# finished (body, content encoding) pairs for seeded requests, keyed by generation parameters
+response_cache = LRUCache(
+    max_entries=int(os.environ.get("DUNGEON_CACHE_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("DUNGEON_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+    sizeof=lambda entry: len(entry[0])
+)
+
+# optional store shared by every worker process, consulted after the per-process cache
+SHARED_STORE_URL = os.environ.get("DUNGEON_SHARED_STORE", "")
+shared_store = None
+if SHARED_STORE_URL:
+    from src.dungeon_store import open_store
+    shared_store = open_store(
+        SHARED_STORE_URL,
+        max_bytes=int(os.environ.get("DUNGEON_SHARED_STORE_MAX_BYTES", str(256 * 1024 * 1024)))
+    )
+
+# dungeons generated with lazy=true, described room by room as players explore
+session_store = LRUCache(
+    max_entries=int(os.environ.get("DUNGEON_SESSION_ENTRIES", "1000")),
+    max_bytes=int(os.environ.get("DUNGEON_SESSION_MAX_BYTES", str(64 * 1024 * 1024))),
+    sizeof=lambda session: session.nbytes(),
+    ttl=float(os.environ.get("DUNGEON_SESSION_TTL", "1800"))
+)
+
+# seeded responses never change for a given generator version
+SEEDED_CACHE_CONTROL = "public, max-age=86400"
+
+# corridor distances of generated layouts for route queries, keyed by seed and size parameters
+layout_cache = LRUCache(
+    max_entries=int(os.environ.get("DUNGEON_LAYOUT_CACHE_ENTRIES", "128")),
+    sizeof=lambda distances: 2 * len(distances.grid.types) + 4 * len(distances.dist)
+)
+
+# resident chunks of unbounded worlds, keyed by seed, chunk coordinates and chunk parameters
+chunk_cache = LRUCache(
+    max_entries=int(os.environ.get("DUNGEON_CHUNK_CACHE_ENTRIES", "512")),
+    sizeof=lambda chunk: chunk.nbytes()
+)
+
+# rendered map tiles, one LRU per lazy dungeon (see /api/dungeon/{id}/tiles)
+TILE_CACHE_ENTRIES = int(os.environ.get("DUNGEON_TILE_CACHE_ENTRIES", "256"))
+TILE_CACHE_MAX_BYTES = int(os.environ.get("DUNGEON_TILE_CACHE_MAX_BYTES", str(4 * 1024 * 1024)))
+
+# cache, executor and pool state, read at scrape time
+CACHES = {"response": response_cache, "session": session_store, "layout": layout_cache, "chunk": chunk_cache}
+if shared_store is not None:
+    CACHES["shared"] = shared_store
+metrics.gauge("dungeon_cache_entries", "Entries held by each cache", ("cache",),
+              source=lambda: {(name,): len(cache) for name, cache in CACHES.items()})
+metrics.gauge("dungeon_cache_bytes", "Approximate bytes held by each cache", ("cache",),
+              source=lambda: {(name,): cache.total_bytes for name, cache in CACHES.items()})
+metrics.gauge("dungeon_executor_in_flight", "Generations running or queued on the executor",
+              source=lambda: {(): executor.in_flight})
+metrics.gauge("dungeon_pool_ready", "Warm pool responses ready to serve",
+              source=lambda: {(): warm_pool.stats()["ready"]})
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if request.scope.get("warmup"):
+        return await call_next(request)
+    requests_in_flight.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        requests_in_flight.dec()
+        # the route template keeps label cardinality bounded
+        route = request.scope.get("route")
+        endpoint = getattr(route, "path", "unmatched")
+        elapsed = time.perf_counter() - start
+        request_seconds.observe(elapsed, endpoint=endpoint, status=str(status))
+        if endpoint not in first_requests:
+            first_requests[endpoint] = elapsed
+            first_request_seconds.set(elapsed, endpoint=endpoint)
+            log_event(logger, logging.INFO, "first request", endpoint=endpoint, seconds=elapsed)
+
+def parse_position(value: str) -> Tuple[int, int]:
+    x, y = value.split(",")
+    return int(x), int(y)
+
+def make_etag(key: tuple) -> str:
+    """Weak ETag from the generation parameters; the body itself is never hashed"""
+    digest = hashlib.sha1(repr((GENERATOR_VERSION,) + key).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match", "")
+    return header.strip() == "*" or etag in (tag.strip() for tag in header.split(","))
+
+def encoded_response(body: bytes, encoding: str, media_type: str, headers: dict) -> Response:
+    headers = dict(headers, Vary="Accept-Encoding")
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=media_type, headers=headers)
+
 @app.get("/api/generate-dungeon")
-async def generate_dungeon():
+async def generate_dungeon(
+    request: Request,
+    seed: Optional[int] = Query(None, ge=0, le=2**63 - 1),
+    iterations: int = Query(DEFAULT_ITERATIONS, ge=1, le=12),
+    cell_size: int = Query(DEFAULT_CELL_SIZE, ge=10, le=200),
+    compact: bool = Query(False),
+    format: str = Query("full", pattern="^(full|layout)$"),
+    binary: bool = Query(False),
+    lazy: bool = Query(False),
+    target_rooms: Optional[int] = Query(None, ge=2, le=MAX_TARGET_ROOMS),
+    tolerance: Optional[int] = Query(None, ge=0, le=MAX_TARGET_ROOMS)
+):
+    if lazy and format != "full":
+        # a layout carries no session, so the room, reroll and tile endpoints could not be used
+        return JSONResponse(content={"error": "lazy=true needs format=full"}, status_code=400)
+
     try:
-        # initial grammar
-        grammar = DungeonGrammar()
-        
-        # generate maps using Lsystem
-        generator = DungeonLSystem()
-        dungeon = generator.generate(iterations=3)
-        
-        # retrive overview description
-        overview = grammar.generate_dungeon_overview()
-        
-        # get image and normalize location
-        visualizer = DungeonVisualizer(cell_size=50)
-        svg_content, normalized_rooms = visualizer.create_svg(dungeon, return_string=True, return_normalized=True)
-        
-        # get normalized location
-        entrance_pos = next((pos for pos, room in normalized_rooms.items() if room.type == 'entrance'), (0, 0))
-        
-        # description attached on normalized location
-        descriptions = {
-            f"{pos[0]},{pos[1]}": grammar.generate_room_description(
-                room.type, 
-                pos, 
-                entrance_pos,
-                normalized_rooms
-            )
-            for pos, room in normalized_rooms.items()
-        }
-        
+        # layout and SVG only; descriptions come from /api/dungeon/{id}/room/{x},{y}
+        if lazy:
+            payload, session = await run_generation(
+                generate_session, new_seed() if seed is None else seed, iterations, cell_size, compact,
+                target_rooms, tolerance)
+            session_store.put(session.id, session)
+            return JSONResponse(content=payload, headers={"Cache-Control": "no-store"})
+
+        binary = binary and format == "layout"
+        media_type = "application/octet-stream" if binary else "application/json"
+        encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+
+        # unseeded requests always get a fresh dungeon
+        if seed is None:
+            result = None
+            if (format == "full" and iterations == DEFAULT_ITERATIONS
+                    and cell_size == DEFAULT_CELL_SIZE and not compact and target_rooms is None):
+                body = warm_pool.pop()
+                if body is not None:
+                    result = compress_body(body, encoding)
+            if result is None:
+                result = await run_generation(build_response_body, format, new_seed(), iterations,
+                                              cell_size, compact, binary, encoding, target_rooms, tolerance)
+            return encoded_response(*result, media_type, {"Cache-Control": "no-store"})
+
+        # seeded requests are deterministic, so the parameters identify the content
+        key = (format, seed, iterations, cell_size, compact, binary, target_rooms, tolerance)
+        headers = {"ETag": make_etag(key), "Cache-Control": SEEDED_CACHE_CONTROL}
+        if etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        result = response_cache.get(key + (encoding,))
+        if result is None and shared_store is not None:
+            store_key = repr((GENERATOR_VERSION,) + key + (encoding,))
+            result = await asyncio.to_thread(shared_store.get, store_key)
+            if result is not None:
+                response_cache.put(key + (encoding,), result)
+        if result is None:
+            result = await run_generation(build_response_body, format, seed, iterations,
+                                          cell_size, compact, binary, encoding, target_rooms, tolerance)
+            response_cache.put(key + (encoding,), result)
+            if shared_store is not None:
+                await asyncio.to_thread(shared_store.put, store_key, result)
+
         # return all
-        return JSONResponse(content={
-            "svg": svg_content,
-            "overview": overview,
-            "descriptions": descriptions,
-            "theme": grammar.current_theme.value,
-            "mainTreasure": grammar.story_state['main_treasure']
-        })
-        
+        return encoded_response(*result, media_type, headers)
+
+    except ExecutorBusy as e:
+        errors_total.inc(kind="busy")
+        return JSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+    except GenerationTimeout as e:
+        errors_total.inc(kind="timeout")
+        return JSONResponse(content={"error": str(e)}, status_code=504)
     except Exception as e:
-        print("Error generating dungeon:", str(e))
-        print("Traceback:", traceback.format_exc())
+        errors_total.inc(kind="internal")
+        log_event(logger, logging.ERROR, "dungeon generation failed", exc_info=True,
+                  error=str(e), seed=seed, iterations=iterations, format=format)
         return JSONResponse(
             content={"error": str(e)},
             status_code=500
         )
 
+@app.get("/api/generate-dungeons")
+async def generate_dungeons(
+    count: int = Query(..., ge=1, le=MAX_BATCH_COUNT),
+    seed: Optional[int] = Query(None, ge=0, le=2**63 - MAX_BATCH_COUNT),
+    iterations: int = Query(DEFAULT_ITERATIONS, ge=1, le=12),
+    cell_size: int = Query(DEFAULT_CELL_SIZE, ge=10, le=200),
+    compact: bool = Query(False),
+    target_rooms: Optional[int] = Query(None, ge=2, le=MAX_TARGET_ROOMS),
+    tolerance: Optional[int] = Query(None, ge=0, le=MAX_TARGET_ROOMS)
+):
+    """Stream `count` dungeons as NDJSON, one line per dungeon as soon as it is ready.
+
+    With `seed` the batch is seeds seed..seed+count-1, otherwise fresh seeds.
+    Lines come in completion order; each carries its seed. A slice that fails
+    (busy executor, timeout, generation error) becomes an {"error", "seeds"}
+    line instead.
+    """
+    seeds = [seed + i for i in range(count)] if seed is not None else [new_seed() for _ in range(count)]
+    slices = [seeds[i:i + BATCH_SLICE] for i in range(0, count, BATCH_SLICE)]
+
+    async def run_slice(batch):
+        try:
+            return await run_generation(generate_ndjson, batch, iterations, cell_size, compact,
+                                        target_rooms, tolerance)
+        except (ExecutorBusy, GenerationTimeout) as e:
+            errors_total.inc(kind="busy" if isinstance(e, ExecutorBusy) else "timeout")
+            return json.dumps({"error": str(e), "seeds": batch}).encode() + b"\n"
+        except Exception as e:
+            errors_total.inc(kind="internal")
+            log_event(logger, logging.ERROR, "dungeon generation failed", exc_info=True,
+                      error=str(e), seeds=batch, iterations=iterations)
+            return json.dumps({"error": str(e), "seeds": batch}).encode() + b"\n"
+
+    async def stream():
+        # at most one slice per worker in flight, leaving queue room for other requests
+        pending = set()
+        remaining = iter(slices)
+        try:
+            while True:
+                while len(pending) < executor.workers:
+                    batch = next(remaining, None)
+                    if batch is None:
+                        break
+                    pending.add(asyncio.ensure_future(run_slice(batch)))
+                if not pending:
+                    break
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield task.result()
+        finally:
+            # client went away; don't leave slices queued behind other requests
+            for task in pending:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-store"})
+
+@app.get("/api/dungeon/{dungeon_id}/room/{x},{y}")
+async def describe_room(dungeon_id: str, x: int, y: int):
+    """Describe a room of a lazy dungeon, generating the text on first visit"""
+    session = session_store.get(dungeon_id)
+    if session is None:
+        return JSONResponse(content={"error": "Unknown or expired dungeon"}, status_code=404)
+
+    pos = (x, y)
+    described = len(session.descriptions)
+    description = session.describe_room(pos)
+    if description is None:
+        return JSONResponse(content={"error": f"No room at {x},{y}"}, status_code=404)
+    if len(session.descriptions) != described:
+        # re-put so the store accounts for the new text
+        session_store.put(session.id, session)
+
+    return {
+        "room": f"{x},{y}",
+        "type": session.rooms[pos].type,
+        "distance": session.distances[pos],
+        "description": description,
+        "story": session.story()
+    }
+
+@app.post("/api/dungeon/{dungeon_id}/reroll/{x},{y}")
+async def reroll_room(
+    dungeon_id: str,
+    x: int,
+    y: int,
+    depth: Optional[int] = Query(None, ge=1, le=8),
+    seed: Optional[int] = Query(None, ge=0, le=2**63 - 1)
+):
+    """Regrow the branch beyond a room of a lazy dungeon and return only what changed"""
+    session = session_store.get(dungeon_id)
+    if session is None:
+        return JSONResponse(content={"error": "Unknown or expired dungeon"}, status_code=404)
+
+    pos = (x, y)
+    if pos not in session.rooms:
+        return JSONResponse(content={"error": f"No room at {x},{y}"}, status_code=404)
+
+    from src.dungeon_edit import reroll_branch
+
+    # the edit mutates the session in place, so it runs here rather than in a worker;
+    # it only touches the old and new branch
+    try:
+        diff = reroll_branch(session, pos, depth, seed)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    # re-put so the store accounts for the new size
+    session_store.put(session.id, session)
+    return diff
+
+@app.get("/api/dungeon/{dungeon_id}/tiles")
+async def dungeon_tiles(dungeon_id: str):
+    """Tile grid of a lazy dungeon: zoom levels, their level of detail and the dungeon bounds"""
+    session = session_store.get(dungeon_id)
+    if session is None:
+        return JSONResponse(content={"error": "Unknown or expired dungeon"}, status_code=404)
+    from src.dungeon_tiles import tile_info
+    return tile_info(session.rooms)
+
+@app.get("/api/dungeon/{dungeon_id}/tiles/{z}/{x}/{y}")
+async def dungeon_tile(request: Request, dungeon_id: str, z: int, x: int, y: int):
+    """One map tile: room markup up close, simple glyphs further out, a PNG thumbnail furthest out"""
+    from src.dungeon_tiles import MAX_ZOOM, render_tile
+
+    session = session_store.get(dungeon_id)
+    if session is None:
+        return JSONResponse(content={"error": "Unknown or expired dungeon"}, status_code=404)
+    if not 0 <= z <= MAX_ZOOM:
+        return JSONResponse(content={"error": f"Zoom must be between 0 and {MAX_ZOOM}"}, status_code=400)
+
+    # a tile only changes when the dungeon is rerolled
+    def tile_headers(rerolls: int) -> Dict[str, str]:
+        return {"ETag": make_etag(("tile", dungeon_id, rerolls, z, x, y)), "Cache-Control": "private, no-cache"}
+
+    headers = tile_headers(session.rerolls)
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    key = (z, x, y, encoding)
+
+    def render() -> Tuple[bytes, str, str]:
+        body, media_type = render_tile(session.rooms, z, x, y, session.cell_size)
+        if media_type == "image/png":
+            return body, "identity", media_type
+        return compress_body(body, encoding) + (media_type,)
+
+    while True:
+        rerolls = session.rerolls
+        if session.tiles is None:
+            session.tiles = LRUCache(max_entries=TILE_CACHE_ENTRIES, max_bytes=TILE_CACHE_MAX_BYTES,
+                                     sizeof=lambda tile: len(tile[0]))
+        tile = session.tiles.get(key)
+        if tile is not None:
+            break
+        # rendered in a thread, not in a worker: the session lives in this process, and
+        # far-out tiles scan every room, which would stall the event loop on big dungeons
+        try:
+            tile = await asyncio.to_thread(render)
+        except Exception:
+            if session.rerolls == rerolls:
+                raise
+            continue  # a reroll changed the rooms under the render
+        if session.rerolls != rerolls:
+            continue  # rendered from the rooms before a reroll
+        session.tiles.put(key, tile)
+        # re-put so the store accounts for the cached tiles
+        session_store.put(session.id, session)
+        break
+    # the ETag of the rooms the tile was rendered from
+    return encoded_response(*tile, tile_headers(rerolls))
+
+@app.get("/api/dungeon-route")
+async def dungeon_route(
+    seed: int = Query(..., ge=0, le=2**63 - 1),
+    start: str = Query(..., pattern=r"^-?\d+,-?\d+$"),
+    end: str = Query(..., pattern=r"^-?\d+,-?\d+$"),
+    iterations: int = Query(DEFAULT_ITERATIONS, ge=1, le=12),
+    target_rooms: Optional[int] = Query(None, ge=2, le=MAX_TARGET_ROOMS),
+    tolerance: Optional[int] = Query(None, ge=0, le=MAX_TARGET_ROOMS)
+):
+    """Shortest corridor route between two rooms of a seeded dungeon"""
+    try:
+        key = (seed, iterations, target_rooms, tolerance)
+        distances = layout_cache.get(key)
+        if distances is None:
+            distances = await run_generation(generate_distances, seed, iterations, target_rooms, tolerance)
+            layout_cache.put(key, distances)
+
+        start_pos, end_pos = parse_position(start), parse_position(end)
+        for pos in (start_pos, end_pos):
+            if pos not in distances:
+                return JSONResponse(content={"error": f"No room at {pos[0]},{pos[1]}"}, status_code=404)
+
+        path = distances.path(start_pos, end_pos)
+        return {
+            "start": list(start_pos),
+            "end": list(end_pos),
+            "distance": len(path) - 1,
+            "path": [list(pos) for pos in path]
+        }
+
+    except ExecutorBusy as e:
+        errors_total.inc(kind="busy")
+        return JSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+    except GenerationTimeout as e:
+        errors_total.inc(kind="timeout")
+        return JSONResponse(content={"error": str(e)}, status_code=504)
+    except Exception as e:
+        errors_total.inc(kind="internal")
+        log_event(logger, logging.ERROR, "dungeon route failed", exc_info=True,
+                  error=str(e), seed=seed, iterations=iterations, start=start, end=end)
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+@app.get("/api/world/{seed}/chunk/{cx},{cy}")
+async def world_chunk(
+    request: Request,
+    seed: int,
+    cx: int,
+    cy: int,
+    chunk_size: int = Query(16, ge=8, le=64),
+    iterations: int = Query(4, ge=1, le=8)
+):
+    """One region of an unbounded dungeon, generated when first explored"""
+    from src.dungeon_chunks import generate_chunk
+
+    try:
+        key = ("chunk", seed, cx, cy, chunk_size, iterations)
+        headers = {"ETag": make_etag(key), "Cache-Control": SEEDED_CACHE_CONTROL}
+        if etag_matches(request, headers["ETag"]):
+            return Response(status_code=304, headers=headers)
+
+        chunk = chunk_cache.get(key)
+        if chunk is None:
+            chunk = await run_generation(generate_chunk, seed, cx, cy, chunk_size, iterations)
+            chunk_cache.put(key, chunk)
+        return JSONResponse(content=chunk.to_dict(), headers=headers)
+
+    except ExecutorBusy as e:
+        errors_total.inc(kind="busy")
+        return JSONResponse(content={"error": str(e)}, status_code=503, headers={"Retry-After": "1"})
+    except GenerationTimeout as e:
+        errors_total.inc(kind="timeout")
+        return JSONResponse(content={"error": str(e)}, status_code=504)
+    except Exception as e:
+        errors_total.inc(kind="internal")
+        log_event(logger, logging.ERROR, "chunk generation failed", exc_info=True,
+                  error=str(e), seed=seed, cx=cx, cy=cy, chunk_size=chunk_size, iterations=iterations)
+        return JSONResponse(content={"error": str(e)}, status_code=500)
+
+@app.get("/api/chunk-stats")
+async def chunk_stats():
+    return chunk_cache.stats()
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    # in a thread: the shared store's gauges query SQLite, which can wait on a locked file
+    return Response(content=await asyncio.to_thread(metrics.render), media_type=MetricsRegistry.CONTENT_TYPE)
+
+@app.get("/api/cache-stats")
+async def cache_stats():
+    return response_cache.stats()
+
+@app.get("/api/store-stats")
+async def store_stats():
+    if shared_store is None:
+        return {"backend": None}
+    return await asyncio.to_thread(shared_store.stats)
+
+@app.get("/api/session-stats")
+async def session_stats():
+    return session_store.stats()
+
+@app.get("/api/executor-stats")
+async def executor_stats():
+    return executor.stats()
+
+@app.get("/api/pool-stats")
+async def pool_stats():
+    return warm_pool.stats()
+
+@app.get("/api/ready")
+async def ready():
+    """Readiness probe: 503 until warm-up has finished, when it failed or when seeded output differs from the snapshot"""
+    if not startup["ready"]:
+        return JSONResponse(content={"ready": False, "warmupError": startup["warmupError"],
+                                     "goldenMismatches": startup["goldenMismatches"]}, status_code=503)
+    return {"ready": True}
+
+@app.get("/api/startup-stats")
+async def startup_stats():
+    return dict(startup, firstRequests=first_requests)
+
+startup["importSeconds"] = time.perf_counter() - IMPORT_STARTED
+startup_seconds.set(startup["importSeconds"], phase="import")
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="debug")
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_level="debug")
@@ -0,0 +1,67 @@
+"""Compare the NumPy batch engine against generating dungeons one by one, and summarize a Monte Carlo run.
+
+Run from the Rulebasesystem directory (needs numpy installed):
+    python benchmarks/bench_batch.py --iterations 3 6 --count 100000
+    python benchmarks/bench_batch.py --iterations 4 --count 1000000 --no-loop --save stats.json
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from src.dungeon_batch import batch_stats
+from src.dungeon_lsystem import DungeonLSystem
+
+def loop_seconds(count: int, iterations: int) -> float:
+    """Seconds per dungeon for DungeonLSystem.generate, one seed at a time"""
+    start = time.perf_counter()
+    for seed in range(count):
+        DungeonLSystem(rng=random.Random(seed)).generate(iterations)
+    return (time.perf_counter() - start) / count
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[3, 6])
+    parser.add_argument("--count", type=int, default=100000, help="dungeons per batch run")
+    parser.add_argument("--loop-count", type=int, default=1000, help="dungeons for the one-by-one baseline")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-loop", action="store_true", help="skip the one-by-one baseline")
+    parser.add_argument("--save", help="write the summary statistics to this JSON file")
+    args = parser.parse_args()
+
+    summary = {}
+    print(f"{'iter':>4} {'dungeons':>9} {'batch us':>9} {'loop us':>9} {'speedup':>8}  "
+          f"{'rooms':>13} {'exit dist':>13} {'dead ends':>13}")
+    for iterations in args.iterations:
+        start = time.perf_counter()
+        stats = batch_stats(args.count, iterations, args.seed, args.chunk_size)
+        batch = (time.perf_counter() - start) / args.count
+        loop = None if args.no_loop else loop_seconds(args.loop_count, iterations)
+
+        described = {name: {"mean": float(values.mean()), "std": float(values.std()),
+                            "min": float(values.min()), "max": float(values.max())}
+                     for name, values in stats.items()}
+        summary[str(iterations)] = {"count": args.count, "usPerDungeon": batch * 1e6,
+                                    "loopUsPerDungeon": loop * 1e6 if loop else None, "stats": described}
+
+        def cell(name):
+            return f"{described[name]['mean']:>6.1f}±{described[name]['std']:<6.1f}"
+
+        loop_text = f"{loop * 1e6:>9.1f} {loop / batch:>7.1f}x" if loop else f"{'-':>9} {'-':>8}"
+        print(f"{iterations:>4} {args.count:>9} {batch * 1e6:>9.1f} {loop_text}  "
+              f"{cell('rooms')} {cell('exitDistance')} {cell('deadEnds')}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"numpy": np.__version__, "seed": args.seed, "results": summary}, f, indent=2)
+        print("Statistics saved to", args.save)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Compare the compiled opcode interpreter against the string interpreter.
+
+Run from the Rulebasesystem directory:
+    python benchmarks/bench_interpreter.py --iterations 3 6 9 12
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.dungeon_lsystem import DungeonLSystem
+
+def time_generate(iterations: int, streaming: bool, compiled: bool, seeds: range) -> float:
+    """Average seconds per generate() call over the given seeds"""
+    start = time.perf_counter()
+    for seed in seeds:
+        DungeonLSystem(rng=random.Random(seed)).generate(iterations, streaming=streaming, compiled=compiled)
+    return (time.perf_counter() - start) / len(seeds)
+
+def check_identical(iterations: int, streaming: bool, seeds: range) -> bool:
+    """Both interpreters must build the same rooms, types and connections"""
+    for seed in seeds:
+        legacy = DungeonLSystem(rng=random.Random(seed)).generate(iterations, streaming=streaming, compiled=False)
+        fast = DungeonLSystem(rng=random.Random(seed)).generate(iterations, streaming=streaming, compiled=True)
+        if list(legacy) != list(fast):
+            return False
+        if any(legacy[pos].type != fast[pos].type
+               or sorted(legacy[pos].connections) != sorted(fast[pos].connections)
+               for pos in legacy):
+            return False
+    return True
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[3, 6, 9, 12])
+    parser.add_argument("--seeds", type=int, default=20, help="number of seeds per configuration")
+    args = parser.parse_args()
+    seeds = range(args.seeds)
+
+    print(f"{'iter':>4} {'mode':>9} {'string ms':>10} {'compiled ms':>12} {'speedup':>8} {'identical':>9}")
+    for iterations in args.iterations:
+        for streaming in (False, True):
+            legacy = time_generate(iterations, streaming, False, seeds)
+            fast = time_generate(iterations, streaming, True, seeds)
+            identical = check_identical(iterations, streaming, seeds)
+            mode = "streaming" if streaming else "string"
+            print(f"{iterations:>4} {mode:>9} {legacy * 1000:>10.3f} {fast * 1000:>12.3f} "
+                  f"{legacy / fast:>7.2f}x {str(identical):>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Time each stage of the generation pipeline and the end-to-end API call.
+
+Run from the Rulebasesystem directory:
+    python benchmarks/bench_pipeline.py --save benchmarks/baseline.json
+    python benchmarks/bench_pipeline.py --compare benchmarks/baseline.json
+
+Stage times come from the pipeline's own `stage()` instrumentation, read
+with collect_stages() around a full generate_payload call for a fixed set of
+seeds and iterations 1-8. A second generate() call with compiled=False times
+the string interpreter (`_apply_rules` / `_interpret_sequence`), reported as
+string_* stages. A second, untimed pass under tracemalloc records the peak
+memory of each call. With --compare, stages slower than the baseline by more
+than --threshold are listed and the script exits with status 1.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.dungeon_grammar import DungeonGrammar
+from src.dungeon_lsystem import DungeonLSystem
+from src.dungeon_metrics import collect_stages
+from src.dungeon_pipeline import STREAMING_MIN_ITERATIONS, generate_payload
+from src.dungeon_visualizer import DungeonVisualizer
+
+try:
+    import svgwrite  # noqa: F401  only needed for the create_svg stage
+except ImportError:
+    svgwrite = None
+
+def payload(seed: int, iterations: int) -> Dict:
+    return generate_payload(seed, iterations, 50, False)
+
+def string_layout(seed: int, iterations: int) -> DungeonLSystem:
+    """The same layout as generate_payload, through the string interpreter"""
+    rng = random.Random(seed)
+    DungeonGrammar(rng=rng)  # drawn first, as in generate_layout
+    generator = DungeonLSystem(rng=rng)
+    generator.generate(iterations=iterations, streaming=iterations >= STREAMING_MIN_ITERATIONS, compiled=False)
+    return generator
+
+def run_stages(seed: int, iterations: int) -> Tuple[Dict[str, float], int]:
+    """Seconds per stage and per whole call for one seed, and its room count"""
+    start = time.perf_counter()
+    _, record = collect_stages(payload, seed, iterations)
+    stages = dict(record["stages"], payload=time.perf_counter() - start)
+    start = time.perf_counter()
+    generator, record = collect_stages(string_layout, seed, iterations)
+    stages["string_layout"] = time.perf_counter() - start
+    stages.update({"string_" + name: seconds for name, seconds in record["stages"].items()})
+    if svgwrite is not None:
+        start = time.perf_counter()
+        DungeonVisualizer(cell_size=50).create_svg(generator.rooms, return_string=True)
+        stages["create_svg"] = time.perf_counter() - start
+    return stages, len(generator.rooms)
+
+def time_stages(seeds: List[int], iterations: int, repeat: int) -> Tuple[Dict[str, float], float]:
+    """Median seconds per stage, summed over the seeds, and the mean room count"""
+    samples: Dict[str, List[float]] = {}
+    room_counts = []
+    for _ in range(repeat):
+        totals: Dict[str, float] = {}
+        room_counts = []
+        for seed in seeds:
+            stages, rooms = run_stages(seed, iterations)
+            room_counts.append(rooms)
+            for name, seconds in stages.items():
+                totals[name] = totals.get(name, 0.0) + seconds
+        for name, seconds in totals.items():
+            samples.setdefault(name, []).append(seconds)
+    return {name: statistics.median(values) for name, values in samples.items()}, statistics.mean(room_counts)
+
+def peak_memory(seeds: List[int], iterations: int) -> Dict[str, int]:
+    """Largest tracemalloc peak (bytes) of each call over the seeds"""
+    peaks: Dict[str, int] = {}
+
+    def measure(name, fn, *args):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = fn(*args)
+        peaks[name] = max(peaks.get(name, 0), tracemalloc.get_traced_memory()[1] - before)
+        return result
+
+    tracemalloc.start()
+    try:
+        for seed in seeds:
+            measure("payload", payload, seed, iterations)
+            generator = measure("string_layout", string_layout, seed, iterations)
+            if svgwrite is not None:
+                measure("create_svg", DungeonVisualizer(cell_size=50).create_svg, generator.rooms, None, True)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def time_api(seeds: List[int], iterations: int, repeat: int) -> Tuple[float, int]:
+    """Median seconds for /api/generate-dungeon over the seeds, and the peak memory"""
+    # inline generation and no response cache, so every call does the full work
+    os.environ.setdefault("DUNGEON_EXECUTOR", "inline")
+    os.environ["DUNGEON_CACHE_ENTRIES"] = "0"
+    from fastapi.testclient import TestClient
+    import api
+
+    def call(client, seed):
+        response = client.get("/api/generate-dungeon", params={"seed": seed, "iterations": iterations})
+        response.raise_for_status()
+
+    with TestClient(api.app) as client:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for seed in seeds:
+                call(client, seed)
+            samples.append(time.perf_counter() - start)
+
+        tracemalloc.start()
+        try:
+            for seed in seeds:
+                call(client, seed)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return statistics.median(samples), peak
+
+def run(seeds: List[int], iterations_range: List[int], repeat: int, api_calls: bool) -> Dict:
+    results = {}
+    print(f"{'iter':>4} {'rooms':>6} {'stage':>22} {'ms':>9} {'us/room':>9} {'peak KB':>9}")
+    for iterations in iterations_range:
+        times, rooms = time_stages(seeds, iterations, repeat)
+        peaks = peak_memory(seeds, iterations)
+        if api_calls:
+            times["api"], peaks["api"] = time_api(seeds, iterations, repeat)
+
+        stages = {}
+        total_rooms = rooms * len(seeds)
+        for name, seconds in times.items():
+            stages[name] = {
+                "ms": seconds * 1000,
+                "usPerRoom": seconds * 1e6 / total_rooms,
+                "peakBytes": peaks.get(name, 0)
+            }
+            print(f"{iterations:>4} {rooms:>6.1f} {name:>22} {seconds * 1000:>9.3f} "
+                  f"{stages[name]['usPerRoom']:>9.2f} {peaks.get(name, 0) / 1024:>9.1f}")
+        results[str(iterations)] = {"rooms": rooms, "stages": stages}
+    return results
+
+def compare(results: Dict, baseline: Dict, threshold: float) -> List[str]:
+    """Stages whose time per room grew by more than `threshold` (a ratio)"""
+    regressions = []
+    for iterations, current in results.items():
+        before = baseline["results"].get(iterations)
+        if before is None:
+            continue
+        for name, stage in current["stages"].items():
+            old = before["stages"].get(name)
+            if old is None or old["usPerRoom"] <= 0:
+                continue
+            ratio = stage["usPerRoom"] / old["usPerRoom"]
+            if ratio > threshold:
+                regressions.append(f"iterations={iterations} {name}: {old['usPerRoom']:.2f} -> "
+                                   f"{stage['usPerRoom']:.2f} us/room ({ratio:.2f}x)")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, nargs="+", default=list(range(1, 9)))
+    parser.add_argument("--seeds", type=int, nargs="+", default=[1, 2, 3, 4, 5])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--no-api", action="store_true", help="skip the end-to-end TestClient stage")
+    parser.add_argument("--save", help="write the results to this baseline JSON file")
+    parser.add_argument("--compare", help="compare against this baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=1.25)
+    args = parser.parse_args()
+
+    results = run(args.seeds, args.iterations, args.repeat, not args.no_api)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "seeds": args.seeds,
+                "repeat": args.repeat,
+                "results": results
+            }, f, indent=2)
+        print("Baseline saved to", args.save)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("seeds") != args.seeds:
+            print("Warning: baseline was recorded with seeds", baseline.get("seeds"))
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION", line)
+        if regressions:
+            sys.exit(1)
+        print("No stage slower than", args.threshold, "x baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Compare the string-buffer SVG renderer against the svgwrite renderer.
+
+Run from the Rulebasesystem directory (needs svgwrite installed):
+    python benchmarks/bench_svg.py --iterations 3 6 9 12
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Callable, Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.dungeon_lsystem import DungeonLSystem
+from src.dungeon_visualizer import DungeonVisualizer
+
+def time_render(render: Callable[[], str], repeat: int) -> Tuple[float, str]:
+    """Average seconds per render and the last SVG produced"""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        svg = render()
+    return (time.perf_counter() - start) / repeat, svg
+
+def count_shapes(svg: str) -> Tuple[int, int]:
+    """Rooms and connection segments drawn, so the renderers can be compared"""
+    rooms = len(re.findall(r'<circle [^>]*cx=|<use ', svg))
+    lines = len(re.findall(r'<line ', svg)) + len(re.findall(r'M[\d.]+ [\d.]+L', svg))
+    return rooms, lines
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, nargs="+", default=[3, 6, 9, 12])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    visualizer = DungeonVisualizer(cell_size=50)
+    print(f"{'iter':>4} {'rooms':>5} {'renderer':>9} {'ms':>8} {'bytes':>8} {'shapes':>10}")
+    for iterations in args.iterations:
+        rooms = DungeonLSystem(rng=random.Random(args.seed)).generate(
+            iterations, streaming=iterations >= 6)
+        renderers = {
+            "svgwrite": lambda: visualizer.create_svg(rooms, return_string=True),
+            "fast": lambda: visualizer.render_svg(rooms),
+            "compact": lambda: visualizer.render_svg(rooms, compact=True),
+        }
+        for name, render in renderers.items():
+            seconds, svg = time_render(render, args.repeat)
+            shapes = "%d/%d" % count_shapes(svg)
+            print(f"{iterations:>4} {len(rooms):>5} {name:>9} {seconds * 1000:>8.3f} "
+                  f"{len(svg.encode()):>8} {shapes:>10}")
+
+if __name__ == "__main__":
+    main()
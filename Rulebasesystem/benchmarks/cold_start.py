@@ -0,0 +1,133 @@
+"""Measure cold start: time to readiness and first-request latency of a freshly started server.
+
+Run from the Rulebasesystem directory:
+    python benchmarks/cold_start.py --runs 5
+    python benchmarks/cold_start.py --variant DUNGEON_WARMUP=0 --variant DUNGEON_WARMUP=1 --env DUNGEON_EXECUTOR=process
+    python benchmarks/cold_start.py --save cold.json
+
+Each run starts uvicorn on a free port (see load_test.py), polls /api/ready
+until it answers, then sends every path once (the first request) followed
+by --repeat more (steady state), each with a seed not used before so no cache
+answers them. The server's own /api/startup-stats (import and warm-up
+seconds, first requests) is recorded alongside.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from typing import Dict, List
+
+from load_test import Connection, free_port, start_server
+
+PATHS = (
+    "/api/generate-dungeon?seed={n}&iterations=5",
+    "/api/generate-dungeon?seed={n}&target_rooms=500",
+    "/api/generate-dungeon?seed={n}&lazy=true",
+    "/api/world/{n}/chunk/0,0"
+)
+
+async def wait_ready(port: int, timeout: float, server) -> None:
+    """Poll until /api/ready answers 200"""
+    deadline = time.monotonic() + timeout
+    while True:
+        if server.poll() is not None:
+            sys.exit(f"Server exited with status {server.returncode}")
+        connection = Connection("127.0.0.1", port)
+        try:
+            status, _ = await connection.get("/api/ready")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            connection.close()
+        if time.monotonic() > deadline:
+            sys.exit(f"Server on port {port} not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.01)
+
+async def timed_get(connection: Connection, path: str) -> float:
+    start = time.perf_counter()
+    status, _ = await connection.get(path)
+    if status != 200:
+        sys.exit(f"{path} returned {status}")
+    return time.perf_counter() - start
+
+async def one_run(env: Dict[str, str], repeat: int, timeout: float) -> Dict:
+    port = free_port()
+    started = time.perf_counter()
+    server = start_server(port, 1, env)
+    try:
+        await wait_ready(port, timeout, server)
+        ready = time.perf_counter() - started
+        connection = Connection("127.0.0.1", port)
+        first, steady = {}, {}
+        for path in PATHS:
+            first[path] = await timed_get(connection, path.format(n=0))
+        for path in PATHS:
+            steady[path] = statistics.median([await timed_get(connection, path.format(n=n))
+                                              for n in range(1, repeat + 1)])
+        _, body = await connection.get("/api/startup-stats", gzip=False)
+        connection.close()
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+    return {"readySeconds": ready, "first": first, "steady": steady, "server": json.loads(body)}
+
+def summarize(runs: List[Dict]) -> Dict:
+    def median(values):
+        return 1000 * statistics.median(values)
+
+    return {
+        "readyMs": median([run["readySeconds"] for run in runs]),
+        "importMs": median([run["server"]["importSeconds"] for run in runs]),
+        "warmupMs": median([run["server"]["warmupSeconds"] or 0.0 for run in runs]),
+        "paths": {path: {"firstMs": median([run["first"][path] for run in runs]),
+                         "steadyMs": median([run["steady"][path] for run in runs])} for path in PATHS}
+    }
+
+def print_summary(name: str, summary: Dict) -> None:
+    print(f"{name}: ready after {summary['readyMs']:.0f} ms (import {summary['importMs']:.0f} ms, "
+          f"warm-up {summary['warmupMs']:.0f} ms)")
+    print(f"  {'path':<50} {'first ms':>9} {'steady ms':>10} {'ratio':>6}")
+    for path, row in summary["paths"].items():
+        print(f"  {path:<50} {row['firstMs']:>9.1f} {row['steadyMs']:>10.1f} "
+              f"{row['firstMs'] / row['steadyMs']:>5.1f}x")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3, help="server starts per variant")
+    parser.add_argument("--repeat", type=int, default=20, help="steady-state requests per path")
+    parser.add_argument("--variant", action="append", default=[], metavar="NAME=VALUE[,NAME=VALUE]",
+                        help="environment to compare; default DUNGEON_WARMUP=0 against DUNGEON_WARMUP=1")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="environment for every variant, e.g. DUNGEON_EXECUTOR=process")
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    base = dict(item.split("=", 1) for item in args.env)
+    variants = args.variant or ["DUNGEON_WARMUP=0", "DUNGEON_WARMUP=1"]
+    results = {}
+    for variant in variants:
+        env = dict(base, **dict(item.split("=", 1) for item in variant.split(",")))
+        runs = [asyncio.run(one_run(env, args.repeat, args.startup_timeout)) for _ in range(args.runs)]
+        results[variant] = {"summary": summarize(runs), "runs": runs}
+        print_summary(variant, results[variant]["summary"])
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "config": {name: value for name, value in vars(args).items() if name != "save"},
+                "results": results
+            }, f, indent=2)
+        print("Results saved to", args.save)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+"""Load-test /api/generate-dungeon on one machine and report latency percentiles.
+
+Run from the Rulebasesystem directory:
+    python benchmarks/load_test.py --concurrency 32 --duration 30 --save load.json
+    python benchmarks/load_test.py --mix 3:6,6:3,9:1 --seed-pool 100 --workers 4
+    python benchmarks/load_test.py --rate 50 --env DUNGEON_EXECUTOR=process
+    python benchmarks/load_test.py --url http://127.0.0.1:8000 --duration 10
+
+The app is started with uvicorn on a free local port unless --url is given.
+Every client connection is a keep-alive HTTP/1.1 connection on raw asyncio
+streams, so the client adds little overhead of its own. By default each
+connection sends its next request as soon as the last one finished (closed
+loop). With --rate, requests are scheduled at a fixed rate instead, and
+latency is counted from the scheduled time, so a stalled server shows up as
+queueing delay rather than as fewer, faster requests.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERCENTILES = (50, 95, 99)
+
+def parse_mix(value: str) -> List[Tuple[int, int]]:
+    """'3:6,6:3' -> [(3, 6), (6, 3)]: iterations and relative weight"""
+    mix = []
+    for part in value.split(","):
+        iterations, _, weight = part.partition(":")
+        mix.append((int(iterations), int(weight or 1)))
+    return mix
+
+def percentile(ordered: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return 0.0
+    rank = max(1, -(-len(ordered) * p // 100))
+    return ordered[int(rank) - 1]
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(port: int, workers: int, env: Dict[str, str]) -> subprocess.Popen:
+    command = [sys.executable, "-m", "uvicorn", "api:app", "--host", "127.0.0.1", "--port", str(port),
+               "--workers", str(workers), "--log-level", "warning", "--no-access-log"]
+    return subprocess.Popen(command, cwd=ROOT, env={**os.environ, **env})
+
+class Connection:
+    """One keep-alive HTTP/1.1 connection; just enough protocol for this API"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader: Optional[asyncio.StreamReader] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+
+    async def get(self, path: str, gzip: bool = True) -> Tuple[int, bytes]:
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        request = f"GET {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+        if gzip:
+            request += "Accept-Encoding: gzip\r\n"
+        self.writer.write((request + "\r\n").encode("ascii"))
+        try:
+            return await self._read_response()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.close()
+            raise
+
+    async def _read_response(self) -> Tuple[int, bytes]:
+        status = int((await self.reader.readuntil(b"\r\n")).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            parts = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";")[0], 16)
+                parts.append(await self.reader.readexactly(size + 2))
+                if size == 0:
+                    break
+            body = b"".join(part[:-2] for part in parts)
+        else:
+            body = await self.reader.readexactly(int(headers.get("content-length", "0")))
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        return status, body
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+async def wait_ready(host: str, port: int, timeout: float, server: Optional[subprocess.Popen]) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        if server is not None and server.poll() is not None:
+            sys.exit(f"Server exited with status {server.returncode}")
+        connection = Connection(host, port)
+        try:
+            status, _ = await connection.get("/api/ready")
+            if status == 200:
+                return
+        except OSError:
+            pass
+        finally:
+            connection.close()
+        if time.monotonic() > deadline:
+            sys.exit(f"Server on port {port} not ready after {timeout:.0f}s")
+        await asyncio.sleep(0.2)
+
+async def run_load(host: str, port: int, args) -> List[Tuple[float, float, int, int, int]]:
+    """Drive the server; returns (start offset, latency, status, bytes, iterations) per request"""
+    mix = parse_mix(args.mix)
+    choices = [iterations for iterations, _ in mix]
+    weights = [weight for _, weight in mix]
+    rng = random.Random(args.client_seed)
+    results = []
+    began = time.perf_counter()
+    warmup_end = began + args.warmup
+    end = warmup_end + args.duration
+    next_slot = [0]
+
+    def request_path() -> Tuple[str, int]:
+        iterations = rng.choices(choices, weights)[0]
+        params = {"iterations": iterations}
+        if args.seed_pool:
+            params["seed"] = rng.randrange(args.seed_pool)
+        if args.compact:
+            params["compact"] = "true"
+        return "/api/generate-dungeon?" + urlencode(params), iterations
+
+    async def client() -> None:
+        connection = Connection(host, port)
+        while True:
+            if args.rate:
+                # open loop: take the next slot of the shared schedule
+                scheduled = began + next_slot[0] / args.rate
+                next_slot[0] += 1
+                if scheduled >= end:
+                    break
+                await asyncio.sleep(max(0.0, scheduled - time.perf_counter()))
+            else:
+                scheduled = time.perf_counter()
+                if scheduled >= end:
+                    break
+            path, iterations = request_path()
+            try:
+                status, body = await connection.get(path, not args.no_gzip)
+                size = len(body)
+            except (OSError, asyncio.IncompleteReadError):
+                status, size = 0, 0
+            finished = time.perf_counter()
+            if scheduled >= warmup_end:
+                results.append((scheduled - warmup_end, finished - scheduled, status, size, iterations))
+        connection.close()
+
+    await asyncio.gather(*(client() for _ in range(args.concurrency)))
+    return results
+
+def summarize(latencies: List[float], sizes: List[int], duration: float) -> Dict:
+    ordered = sorted(latencies)
+    summary = {
+        "requests": len(ordered),
+        "throughput": len(ordered) / duration if duration else 0.0,
+        "bytesPerSecond": sum(sizes) / duration if duration else 0.0,
+        "meanMs": 1000 * sum(ordered) / len(ordered) if ordered else 0.0,
+        "maxMs": 1000 * ordered[-1] if ordered else 0.0
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}Ms"] = 1000 * percentile(ordered, p)
+    return summary
+
+def report(results: List[Tuple[float, float, int, int, int]], duration: float) -> Dict:
+    ok = [r for r in results if r[2] == 200]
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r[2])] = statuses.get(str(r[2]), 0) + 1
+
+    by_iterations = {}
+    for iterations in sorted({r[4] for r in ok}):
+        rows = [r for r in ok if r[4] == iterations]
+        by_iterations[str(iterations)] = summarize([r[1] for r in rows], [r[3] for r in rows], duration)
+
+    # per-second buckets show stalls (GC, a blocked event loop) that percentiles smooth over
+    timeline = []
+    for second in range(int(duration + 0.999)):
+        rows = [r for r in ok if second <= r[0] < second + 1]
+        ordered = sorted(r[1] for r in rows)
+        timeline.append({"second": second, "requests": len(rows),
+                         "p50Ms": 1000 * percentile(ordered, 50), "p99Ms": 1000 * percentile(ordered, 99)})
+
+    return {
+        "overall": summarize([r[1] for r in ok], [r[3] for r in ok], duration),
+        "statuses": statuses,
+        "byIterations": by_iterations,
+        "timeline": timeline
+    }
+
+def print_report(result: Dict) -> None:
+    header = f"{'iter':>5} {'requests':>9} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}"
+    print(header)
+    rows = list(result["byIterations"].items()) + [("all", result["overall"])]
+    for name, s in rows:
+        print(f"{name:>5} {s['requests']:>9} {s['throughput']:>8.1f} {s['p50Ms']:>9.1f} "
+              f"{s['p95Ms']:>9.1f} {s['p99Ms']:>9.1f} {s['maxMs']:>9.1f}")
+    print("Status counts:", ", ".join(f"{status}: {count}" for status, count in sorted(result["statuses"].items())))
+
+async def scrape_stages(host: str, port: int) -> Dict[str, float]:
+    """Server-side seconds per generation stage, from /metrics (this worker's share with --workers > 1)"""
+    connection = Connection(host, port)
+    try:
+        status, body = await connection.get("/metrics", gzip=False)
+    except OSError:
+        return {}
+    finally:
+        connection.close()
+    stages = {}
+    if status == 200:
+        prefix = 'dungeon_stage_duration_seconds_sum{stage="'
+        for line in body.decode().splitlines():
+            if line.startswith(prefix):
+                name, _, value = line[len(prefix):].partition('"} ')
+                stages[name] = float(value)
+    return stages
+
+async def main_async(args) -> Dict:
+    server = None
+    if args.url:
+        parts = urlsplit(args.url)
+        host, port = parts.hostname, parts.port or 80
+    else:
+        host, port = "127.0.0.1", free_port()
+        env = dict(item.split("=", 1) for item in args.env)
+        server = start_server(port, args.workers, env)
+    try:
+        await wait_ready(host, port, args.startup_timeout, server)
+        results = await run_load(host, port, args)
+        stages = await scrape_stages(host, port)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    result = report(results, args.duration)
+    result["serverStageSeconds"] = stages
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=16, help="client connections")
+    parser.add_argument("--duration", type=float, default=20.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of load before measuring")
+    parser.add_argument("--rate", type=float, default=0.0, help="requests per second (open loop); 0 for closed loop")
+    parser.add_argument("--mix", default="3:6,5:3,7:1", help="iterations:weight pairs")
+    parser.add_argument("--seed-pool", type=int, default=0,
+                        help="draw seeds from 0..N-1 (cacheable); 0 sends unseeded requests")
+    parser.add_argument("--compact", action="store_true")
+    parser.add_argument("--no-gzip", action="store_true", help="don't send Accept-Encoding: gzip")
+    parser.add_argument("--client-seed", type=int, default=1, help="seed for the request mix")
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--env", action="append", default=[], metavar="NAME=VALUE",
+                        help="environment for the started server, e.g. DUNGEON_EXECUTOR=process")
+    parser.add_argument("--startup-timeout", type=float, default=30.0)
+    parser.add_argument("--save", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    print_report(result)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "config": {name: value for name, value in vars(args).items() if name != "save"},
+                "results": result
+            }, f, indent=2)
+        print("Results saved to", args.save)
+
+if __name__ == "__main__":
+    main()
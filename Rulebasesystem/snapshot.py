@@ -0,0 +1,42 @@
+"""Build the prebuilt rule snapshot the API loads at startup, or validate it against the source.
+
+    python snapshot.py build
+    python snapshot.py check
+"""
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import argparse
+
+from src.dungeon_snapshot import SNAPSHOT_PATH, check_snapshot, write_snapshot
+
+def build(args) -> None:
+    snapshot = write_snapshot(args.path)
+    print(f"Wrote {args.path}: generator version {snapshot['generatorVersion']}, "
+          f"{len(snapshot['golden'])} seeded dungeons pinned", file=sys.stderr)
+
+def check(args) -> None:
+    problems = check_snapshot(args.path)
+    if problems:
+        sys.exit(f"{args.path} is out of date:\n  " + "\n  ".join(problems)
+                 + "\nRun `python snapshot.py build` (after bumping GENERATOR_VERSION if seeded output changed)")
+    print(f"{args.path} matches the source", file=sys.stderr)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    builder = commands.add_parser("build", help="compile the rules and pin seeded outputs")
+    builder.add_argument("--path", default=SNAPSHOT_PATH)
+    builder.set_defaults(run=build)
+
+    checker = commands.add_parser("check", help="exit non-zero if the snapshot no longer matches the source")
+    checker.add_argument("--path", default=SNAPSHOT_PATH)
+    checker.set_defaults(run=check)
+
+    args = parser.parse_args()
+    args.run(args)
+
+if __name__ == "__main__":
+    main()
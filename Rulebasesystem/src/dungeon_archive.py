@@ -0,0 +1,237 @@
+import json
+import mmap
+import os
+import struct
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from .dungeon_layout import decode_layout_binary
+from .dungeon_pipeline import generate_body, generate_layout_body
+
+# An archive is an append-only data file plus an index file next to it.
+# Data: records back to back; JSONL records end with a newline, binary
+# records are the DGL1 layout format. Index: a header, then one fixed-size
+# entry per record, in increasing seed order so lookups can bisect.
+ARCHIVE_FORMATS = ("jsonl", "binary")
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"DGX1"
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct("<4sBBBxHH")  # magic, version, format, iterations, cell size, target rooms
+INDEX_ENTRY = struct.Struct("<QQI")  # seed, data offset, record length
+
+def export_record(fmt: str, seed: int, iterations: int, cell_size: int, target_rooms: Optional[int] = None) -> bytes:
+    """One archive record: a full JSON payload line or a binary layout"""
+    if fmt == "binary":
+        return generate_layout_body(seed, iterations, True, target_rooms)
+    return generate_body(seed, iterations, cell_size, False, target_rooms) + b"\n"
+
+def export_batch(fmt: str, seeds: List[int], iterations: int, cell_size: int,
+                 target_rooms: Optional[int] = None) -> List[bytes]:
+    """Worker entry point: records for a batch of seeds, in the same order"""
+    return [export_record(fmt, seed, iterations, cell_size, target_rooms) for seed in seeds]
+
+class ArchiveWriter:
+    """Appends records to an archive and its index.
+
+    Reopening an existing archive continues it: a record cut off by a crash
+    (data written, index entry not) is truncated away first. A data file
+    without a readable index is refused rather than overwritten. Seeds must
+    keep increasing across the whole archive.
+    """
+
+    def __init__(self, path: str, fmt: str = "jsonl", iterations: int = 3, cell_size: int = 50,
+                 target_rooms: Optional[int] = None):
+        if fmt not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unknown archive format: {fmt}")
+        self.path = path
+        self.fmt = fmt
+        self.iterations = iterations
+        self.cell_size = cell_size
+        self.target_rooms = target_rooms
+        self.last_seed: Optional[int] = None
+        self.count = 0
+
+        # the index header stores these in one and two bytes
+        for name, value, limit in (("iterations", iterations, 0xFF), ("cell size", cell_size, 0xFFFF),
+                                   ("target rooms", target_rooms or 0, 0xFFFF)):
+            if not 0 <= value <= limit:
+                raise ValueError(f"Archive {name} must be between 0 and {limit}, got {value}")
+
+        header = INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, ARCHIVE_FORMATS.index(fmt),
+                                   iterations, cell_size, target_rooms or 0)
+        index_path = path + INDEX_SUFFIX
+        data_end = 0
+        if os.path.exists(index_path) and os.path.getsize(index_path) >= INDEX_HEADER.size:
+            with open(index_path, "rb") as f:
+                if f.read(INDEX_HEADER.size) != header:
+                    raise ValueError(f"{path} was written with different settings")
+            entries = (os.path.getsize(index_path) - INDEX_HEADER.size) // INDEX_ENTRY.size
+            index_size = INDEX_HEADER.size + entries * INDEX_ENTRY.size
+            if entries:
+                with open(index_path, "rb") as f:
+                    f.seek(index_size - INDEX_ENTRY.size)
+                    seed, offset, length = INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))
+                self.last_seed, data_end = seed, offset + length
+            self.count = entries
+            # drop a torn index entry or data past the last complete record
+            with open(index_path, "r+b") as f:
+                f.truncate(index_size)
+            self._index = open(index_path, "ab")
+        elif os.path.exists(path) and os.path.getsize(path) > 0:
+            # without the index there is no telling where complete records end
+            raise ValueError(f"{path} has data but no valid index at {index_path}; refusing to overwrite it")
+        else:
+            self._index = open(index_path, "wb")
+            self._index.write(header)
+
+        self._data = open(path, "ab")
+        self._data.truncate(data_end)
+        self._data.seek(data_end)
+        self.offset = data_end
+
+    def append(self, seed: int, record: bytes) -> None:
+        if not 0 <= seed < 2**64:
+            raise ValueError(f"Seed {seed} does not fit the archive index")
+        if self.last_seed is not None and seed <= self.last_seed:
+            raise ValueError(f"Seed {seed} is not above the last archived seed {self.last_seed}")
+        self._data.write(record)
+        self._index.write(INDEX_ENTRY.pack(seed, self.offset, len(record)))
+        self.offset += len(record)
+        self.last_seed = seed
+        self.count += 1
+
+    def flush(self) -> None:
+        # data first, so every indexed record is complete on disk
+        self._data.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._data.close()
+        self._index.close()
+
+    def __enter__(self) -> "ArchiveWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _batches(seeds: Iterable[int], size: int) -> Iterator[List[int]]:
+    batch = []
+    for seed in seeds:
+        batch.append(seed)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def export_archive(writer: ArchiveWriter, seeds: Iterable[int], workers: Optional[int] = None,
+                   batch_size: int = 64, progress: Optional[Callable[[int], None]] = None) -> int:
+    """Generate `seeds` on a process pool and append them to the archive in order.
+
+    At most two batches per worker are in flight, so memory stays flat however
+    many seeds there are; results are written in submission order, which keeps
+    the index sorted. Returns the number of records written.
+    """
+    workers = workers or os.cpu_count() or 1
+    written = 0
+    pending = deque()
+    batches = _batches(seeds, batch_size)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit() -> bool:
+            batch = next(batches, None)
+            if batch is None:
+                return False
+            pending.append((batch, pool.submit(export_batch, writer.fmt, batch, writer.iterations,
+                                               writer.cell_size, writer.target_rooms)))
+            return True
+
+        while len(pending) < 2 * workers and submit():
+            pass
+        while pending:
+            batch, future = pending.popleft()
+            for seed, record in zip(batch, future.result()):
+                writer.append(seed, record)
+            written += len(batch)
+            writer.flush()
+            if progress is not None:
+                progress(written)
+            submit()
+    return written
+
+class ArchiveReader:
+    """Random access to an archive by seed through memory-mapped files"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path + INDEX_SUFFIX, "rb") as f:
+            self._index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, fmt, iterations, cell_size, target_rooms = INDEX_HEADER.unpack_from(self._index)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            raise ValueError(f"{path} is not a dungeon archive")
+        self.fmt = ARCHIVE_FORMATS[fmt]
+        self.iterations = iterations
+        self.cell_size = cell_size
+        self.target_rooms = target_rooms or None
+        self._count = (len(self._index) - INDEX_HEADER.size) // INDEX_ENTRY.size
+
+        # mmap refuses empty files
+        self._data = None
+        if os.path.getsize(path):
+            with open(path, "rb") as f:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _entry(self, i: int):
+        return INDEX_ENTRY.unpack_from(self._index, INDEX_HEADER.size + i * INDEX_ENTRY.size)
+
+    def _find(self, seed: int) -> Optional[int]:
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._entry(mid)[0] < seed:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self._count and self._entry(lo)[0] == seed:
+            return lo
+        return None
+
+    def get_bytes(self, seed: int) -> Optional[bytes]:
+        """The raw record for a seed, or None when it is not archived"""
+        i = self._find(seed)
+        if i is None:
+            return None
+        _, offset, length = self._entry(i)
+        return self._data[offset:offset + length]
+
+    def get(self, seed: int) -> Optional[Dict]:
+        """The decoded record: the API payload for JSONL, the layout dict for binary"""
+        record = self.get_bytes(seed)
+        if record is None:
+            return None
+        if self.fmt == "binary":
+            return decode_layout_binary(record)
+        return json.loads(record)
+
+    def seeds(self) -> Iterator[int]:
+        for i in range(self._count):
+            yield self._entry(i)[0]
+
+    def __contains__(self, seed: int) -> bool:
+        return self._find(seed) is not None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        self._index.close()
+        if self._data is not None:
+            self._data.close()
+
+    def __enter__(self) -> "ArchiveReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,306 @@
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+try:
+    import numpy as np  # optional, only needed for batch generation
+except ImportError:
+    np = None
+
+from .dungeon_grid import ROOM_TYPES, TYPE_CODES
+from .dungeon_lsystem import DIRECTION_VECTORS, DungeonLSystem, Room, TURTLE_OPCODES, OP_FORWARD, OP_RIGHT, OP_LEFT, OP_PUSH, OP_POP
+
+# Many dungeons are derived and interpreted together as flat NumPy arrays:
+# the symbols of every dungeon back to back, with `offsets` marking where each
+# one starts. Rooms come out the same way, as a struct of arrays in each
+# dungeon's creation order.
+
+# Room coordinates are packed into one int64 key per (dungeon, x, y)
+_COORD_BITS = 21
+_COORD_BIAS = 1 << (_COORD_BITS - 1)
+_COORD_MASK = (1 << _COORD_BITS) - 1
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("Batch generation needs numpy (pip install numpy)")
+
+class _Productions:
+    """Rule set compiled to lookup tables: every symbol has one or more productions.
+
+    Symbols without a rule get a single production, themselves, so one
+    expansion step treats every symbol alike.
+    """
+
+    def __init__(self, rules: Mapping[str, Sequence[str]]):
+        symbols = list(TURTLE_OPCODES)
+        for symbol, productions in rules.items():
+            for char in symbol + "".join(productions):
+                if char not in symbols:
+                    symbols.append(char)
+        self.codes = {symbol: code for code, symbol in enumerate(symbols)}
+
+        bodies: List[str] = []
+        self.start = np.zeros(len(symbols), dtype=np.int64)
+        self.count = np.zeros(len(symbols), dtype=np.int64)
+        for symbol, code in self.codes.items():
+            self.start[code] = len(bodies)
+            productions = rules.get(symbol, [symbol])
+            self.count[code] = len(productions)
+            bodies.extend(productions)
+
+        width = max(len(body) for body in bodies)
+        self.table = np.zeros((len(bodies), width), dtype=np.int8)
+        self.length = np.array([len(body) for body in bodies], dtype=np.int64)
+        for i, body in enumerate(bodies):
+            self.table[i, :len(body)] = [self.codes[char] for char in body]
+
+    def expand(self, tokens, offsets, rng):
+        """One derivation step for every dungeon at once: a production per symbol, spliced in place"""
+        chosen = self.start[tokens] + (rng.random(len(tokens), dtype=np.float32) * self.count[tokens]).astype(np.int64)
+        lengths = self.length[chosen]
+        ends = np.cumsum(lengths)
+        # output symbol k copies table cell (row chosen[i], column k - start of i)
+        shift = np.repeat(chosen * self.table.shape[1] - (ends - lengths), lengths)
+        expanded = self.table.ravel()[shift + np.arange(len(shift))]
+        return expanded, np.concatenate(([0], ends))[offsets]
+
+def _segmented_cumsum(values, segment_starts):
+    """Inclusive running sum that restarts at every True in `segment_starts`"""
+    total = np.cumsum(values, dtype=np.int32)
+    first = np.flatnonzero(segment_starts)
+    before = total[first] - values[first]
+    return total - np.repeat(before, np.diff(np.append(first, len(values))))
+
+def _turtle(tokens, offsets, turn: int = 1):
+    """Heading and position after every symbol, for all dungeons at once.
+
+    A push leaves the state unchanged and a pop restores it to the matching
+    push, so the state of a symbol at bracket level L is the state of its
+    enclosing push (level L - 1) plus the turns and steps before it at level
+    L under the same push. Levels are processed outwards-in, each one as a
+    segmented running sum over the batch.
+    """
+    pushes = tokens == OP_PUSH
+    depth = np.cumsum(pushes.astype(np.int8) - (tokens == OP_POP), dtype=np.int32)
+    level = (depth - pushes).astype(np.int16)
+
+    # work on the symbols grouped by level (radix sort, so each group keeps
+    # sequence order); a level is then one contiguous slice
+    order = np.argsort(level, kind="stable")
+    bounds = np.concatenate(([0], np.cumsum(np.bincount(level)))) if len(tokens) else np.zeros(1, dtype=np.int64)
+    sorted_tokens = tokens[order]
+    turn_table = np.zeros(128, dtype=np.int8)  # by symbol code; codes are int8
+    turn_table[OP_RIGHT], turn_table[OP_LEFT] = turn, -turn
+    turns = turn_table[sorted_tokens]
+    forward = sorted_tokens == OP_FORWARD
+    is_push = sorted_tokens == OP_PUSH
+    dx = np.array([v[0] for v in DIRECTION_VECTORS], dtype=np.int8)
+    dy = np.array([v[1] for v in DIRECTION_VECTORS], dtype=np.int8)
+    heading = np.zeros(len(tokens), dtype=np.int8)
+    x = np.zeros(len(tokens), dtype=np.int32)
+    y = np.zeros(len(tokens), dtype=np.int32)
+
+    for current in range(len(bounds) - 1):
+        lo, hi = bounds[current], bounds[current + 1]
+        positions = order[lo:hi]
+        if current == 0:
+            # level 0 starts from the entrance, heading east, in every dungeon
+            enclosing = np.searchsorted(offsets[:-1], positions, side="right") - 1
+            base_heading = base_x = base_y = 0
+        else:
+            # the enclosing push is the last push one level out
+            parents = bounds[current - 1] + np.flatnonzero(is_push[bounds[current - 1]:lo])
+            enclosing = parents[np.searchsorted(order[parents], positions, side="right") - 1]
+            base_heading, base_x, base_y = heading[enclosing], x[enclosing], y[enclosing]
+        starts = np.ones(hi - lo, dtype=bool)
+        starts[1:] = enclosing[1:] != enclosing[:-1]
+
+        level_heading = (base_heading + _segmented_cumsum(turns[lo:hi], starts)) & 3
+        heading[lo:hi] = level_heading
+        moving = forward[lo:hi]
+        x[lo:hi] = base_x + _segmented_cumsum(np.where(moving, dx[level_heading], 0), starts)
+        y[lo:hi] = base_y + _segmented_cumsum(np.where(moving, dy[level_heading], 0), starts)
+
+    # back to sequence order
+    restore = np.empty_like(order)
+    restore[order] = np.arange(len(order))
+    heading, x, y = heading[restore], x[restore], y[restore]
+    return heading, x, y
+
+def _keys(dungeon, x, y):
+    x = np.asarray(x, dtype=np.int64) + _COORD_BIAS
+    y = np.asarray(y, dtype=np.int64) + _COORD_BIAS
+    return (dungeon << (2 * _COORD_BITS)) | (x << _COORD_BITS) | y
+
+def _depths(parent):
+    """Corridor distance of every room from its entrance, by pointer jumping.
+
+    Each round adds the distance already known at the room's pointer and then
+    doubles the pointer, so a tree of depth d takes about log2(d) rounds.
+    """
+    pointer = np.where(parent >= 0, parent, np.arange(len(parent)))
+    depth = (parent >= 0).astype(np.int32)
+    while True:
+        jumped = pointer[pointer]
+        if np.array_equal(jumped, pointer):
+            return depth
+        depth = depth + depth[pointer]
+        pointer = jumped
+
+class BatchLayouts:
+    """Rooms of many dungeons as a struct of arrays, in each dungeon's creation order.
+
+    Rooms of dungeon i are rows room_offsets[i] to room_offsets[i + 1] - 1.
+    Entrances are at (0, 0). `parent` is the global row of the room a room was
+    grown from (-1 for entrances); since layouts are trees that one link per
+    room is every connection. `types` holds dungeon_grid.TYPE_CODES.
+    """
+
+    def __init__(self, room_offsets, x, y, parent, depth, types):
+        self.room_offsets = room_offsets
+        self.x = x
+        self.y = y
+        self.parent = parent
+        self.depth = depth
+        self.types = types
+
+    def __len__(self) -> int:
+        return len(self.room_offsets) - 1
+
+    @property
+    def dungeon(self):
+        """Dungeon number of every room"""
+        return np.repeat(np.arange(len(self)), np.diff(self.room_offsets))
+
+    def rooms(self, i: int) -> Dict[Tuple[int, int], Room]:
+        """Dungeon i as the position -> Room dict DungeonLSystem.generate describes"""
+        start, end = int(self.room_offsets[i]), int(self.room_offsets[i + 1])
+        rooms = {}
+        for row in range(start, end):
+            pos = (int(self.x[row]), int(self.y[row]))
+            rooms[pos] = Room(pos[0], pos[1], ROOM_TYPES[self.types[row] - 1])
+            if self.parent[row] >= 0:
+                parent = (int(self.x[self.parent[row]]), int(self.y[self.parent[row]]))
+                rooms[pos].connections.append(parent)
+                rooms[parent].connections.append(pos)
+        return rooms
+
+    def stats(self) -> Dict[str, "np.ndarray"]:
+        """Per-dungeon statistics, one array entry per dungeon"""
+        starts = self.room_offsets[:-1]
+        dungeon = self.dungeon
+        children = np.bincount(self.parent[self.parent >= 0], minlength=len(self.parent))
+        degree = children + (self.parent >= 0)
+        counts = {name: np.bincount(dungeon[self.types == code], minlength=len(self))
+                  for name, code in TYPE_CODES.items()}
+        rooms = np.diff(self.room_offsets)
+        return {
+            "rooms": rooms,
+            "width": np.maximum.reduceat(self.x, starts) - np.minimum.reduceat(self.x, starts) + 1,
+            "height": np.maximum.reduceat(self.y, starts) - np.minimum.reduceat(self.y, starts) + 1,
+            "exitDistance": np.maximum.reduceat(self.depth, starts),
+            "meanDistance": np.add.reduceat(self.depth, starts) / rooms,
+            "deadEnds": np.bincount(dungeon[(degree == 1) & (self.parent >= 0)], minlength=len(self)),
+            "treasure": counts["treasure"],
+            "monster": counts["monster"]
+        }
+
+def _layout(tokens, offsets, rng, turn: int = 1) -> BatchLayouts:
+    """Interpret a batch of symbol sequences the way _interpret_compiled does one.
+
+    A forward step creates a room only where its dungeon has none yet, linked
+    to the room the step came from, so a room is the first visit of a cell.
+    """
+    count = len(offsets) - 1
+    heading, x, y = _turtle(tokens, offsets, turn)
+    steps = np.flatnonzero(tokens == OP_FORWARD)
+    step_dungeon = np.searchsorted(offsets[:-1], steps, side="right") - 1
+    move = np.array(DIRECTION_VECTORS, dtype=np.int64)[heading[steps]]
+
+    # entrances first, so a step back onto (0, 0) never creates a room
+    entrances = np.arange(count, dtype=np.int64)
+    keys = np.concatenate((_keys(entrances, 0, 0), _keys(step_dungeon, x[steps], y[steps])))
+    order = np.concatenate((2 * offsets[:-1], 2 * steps + 1))
+    unique_keys, first = np.unique(keys, return_index=True)
+
+    # rooms in creation order: by the time of their first visit
+    created = np.argsort(order[first], kind="stable")
+    first = first[created]
+    room_keys = unique_keys[created]
+    row_of_key = np.empty(len(created), dtype=np.int64)
+    row_of_key[created] = np.arange(len(created))
+
+    room_dungeon = room_keys >> (2 * _COORD_BITS)
+    room_x = ((room_keys >> _COORD_BITS) & _COORD_MASK) - _COORD_BIAS
+    room_y = (room_keys & _COORD_MASK) - _COORD_BIAS
+
+    # a room's parent is the cell its first visit stepped from
+    parent = np.full(len(first), -1, dtype=np.int64)
+    grown = first >= count
+    step = first[grown] - count
+    from_keys = _keys(step_dungeon[step], x[steps][step] - move[step, 0], y[steps][step] - move[step, 1])
+    parent[grown] = row_of_key[np.searchsorted(unique_keys, from_keys)]
+
+    room_offsets = np.searchsorted(room_dungeon, np.arange(count + 1))
+    depth = _depths(parent)
+    types = _place_types(room_offsets, room_dungeon, depth, parent, rng)
+    return BatchLayouts(room_offsets, room_x.astype(np.int32), room_y.astype(np.int32),
+                        parent, depth, types)
+
+def _place_types(room_offsets, room_dungeon, depth, parent, rng):
+    """Entrance, exit and the default special rooms, as DungeonLSystem places them.
+
+    The exit is the farthest room (the earliest created on ties). Then one in
+    ten normal rooms becomes treasure and one in five of the rest a monster,
+    drawn uniformly: a random order of each dungeon's normal rooms, whose
+    first rooms become treasure and the next ones monsters.
+    """
+    types = np.full(len(parent), TYPE_CODES["normal"], dtype=np.uint8)
+    types[parent < 0] = TYPE_CODES["entrance"]
+    starts = room_offsets[:-1]
+    farthest = np.maximum.reduceat(depth, starts)
+    candidates = np.flatnonzero(depth == farthest[room_dungeon])
+    _, first = np.unique(room_dungeon[candidates], return_index=True)
+    types[candidates[first]] = TYPE_CODES["exit"]
+
+    normal = np.flatnonzero(types == TYPE_CODES["normal"])
+    shuffled = normal[np.lexsort((rng.random(len(normal)), room_dungeon[normal]))]
+    dungeon = room_dungeon[shuffled]
+    available = np.bincount(dungeon, minlength=len(starts))
+    rank = np.arange(len(shuffled)) - np.searchsorted(dungeon, dungeon)
+    treasure = np.minimum(np.maximum(1, available // 10), available)
+    monster = np.minimum(np.maximum(1, (available - treasure) // 5), available - treasure)
+    types[shuffled[rank < treasure[dungeon]]] = TYPE_CODES["treasure"]
+    types[shuffled[(rank >= treasure[dungeon]) & (rank < (treasure + monster)[dungeon])]] = TYPE_CODES["monster"]
+    return types
+
+def generate_batch(count: int, iterations: int = 3, seed: Optional[int] = None,
+                   rules: Optional[Mapping[str, Sequence[str]]] = None, axiom: str = "S") -> BatchLayouts:
+    """Derive and lay out `count` independent dungeons together.
+
+    Every production choice is uniform, as in DungeonLSystem, so the layouts
+    follow the same distribution as generate(); they are not the layouts of
+    any particular per-dungeon seed. `seed` makes the whole batch reproducible.
+    """
+    _require_numpy()
+    if count >= 1 << _COORD_BITS:
+        raise ValueError(f"At most {(1 << _COORD_BITS) - 1} dungeons per batch; batch_stats works in chunks")
+    rng = np.random.default_rng(seed)
+    productions = _Productions(rules if rules is not None else DungeonLSystem().rules)
+    axiom_codes = np.array([productions.codes[char] for char in axiom], dtype=np.int8)
+    tokens = np.tile(axiom_codes, count)
+    offsets = np.arange(count + 1, dtype=np.int64) * len(axiom_codes)
+    for _ in range(iterations):
+        tokens, offsets = productions.expand(tokens, offsets, rng)
+    return _layout(tokens, offsets, rng)
+
+def batch_stats(count: int, iterations: int = 3, seed: Optional[int] = None, chunk_size: int = 10000,
+                rules: Optional[Mapping[str, Sequence[str]]] = None) -> Dict[str, "np.ndarray"]:
+    """BatchLayouts.stats() for `count` dungeons, generated `chunk_size` at a time to bound memory"""
+    _require_numpy()
+    chunks = []
+    children = np.random.SeedSequence(seed).spawn((count + chunk_size - 1) // chunk_size)
+    for i, child in enumerate(children):
+        size = min(chunk_size, count - i * chunk_size)
+        chunks.append(generate_batch(size, iterations, child, rules).stats())
+    if not chunks:
+        return {}
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]}
@@ -0,0 +1,161 @@
+import random
+from typing import Dict, List, Tuple
+
+from .dungeon_grid import DungeonGrid, ROOM_TYPES, TYPE_CODES, NEIGHBOR_BITS
+from .dungeon_metrics import observe
+from .dungeon_lsystem import (DungeonLSystem, DIRECTION_VECTORS,
+                              OP_FORWARD, OP_RIGHT, OP_LEFT, OP_PUSH, OP_POP)
+
+# Border sides: adjacency bit and the chunk on the other side
+SIDES = {
+    'east': (1, (1, 0)),
+    'south': (2, (0, 1)),
+    'west': (4, (-1, 0)),
+    'north': (8, (0, -1)),
+}
+
+def border_door(world_seed: int, cx: int, cy: int, side: str, size: int) -> int:
+    """Door offset along the east ('e') or south ('s') border of chunk (cx, cy).
+
+    Both chunks sharing a border derive it from the same seed, so each can be
+    generated on its own and their doors still line up.
+    """
+    return random.Random(f"{world_seed}:{side}:{cx}:{cy}").randrange(1, size - 1)
+
+class DungeonChunk:
+    """One fixed-size region of an unbounded dungeon.
+
+    Rooms live in a local size x size DungeonGrid. A door cell on each border
+    has its adjacency bit set towards the neighbouring chunk, whose matching
+    door sits on the cell right across the border.
+    """
+
+    def __init__(self, cx: int, cy: int, size: int, grid: DungeonGrid, doors: Dict[str, Tuple[int, int]]):
+        self.cx = cx
+        self.cy = cy
+        self.size = size
+        self.grid = grid
+        self.doors = doors
+
+    @property
+    def origin(self) -> Tuple[int, int]:
+        return self.cx * self.size, self.cy * self.size
+
+    def to_dict(self) -> Dict:
+        """Layout arrays in world coordinates, like format=layout, plus the doors"""
+        grid = self.grid
+        ox, oy = self.origin
+        room_at = {}
+        xs, ys, types = [], [], []
+        for i, (x, y) in enumerate(zip(grid.xs, grid.ys)):
+            room_at[(x, y)] = i
+            xs.append(x + ox)
+            ys.append(y + oy)
+            types.append(grid.types[grid.index(x, y)])
+
+        # connections inside the chunk, once each from the west/north end
+        edges = []
+        for i, (x, y) in enumerate(zip(grid.xs, grid.ys)):
+            mask = grid.masks[grid.index(x, y)]
+            for dx, dy, bit in NEIGHBOR_BITS[:2]:
+                if mask & bit and (x + dx, y + dy) in room_at:
+                    edges.extend((i, room_at[(x + dx, y + dy)]))
+
+        return {
+            "chunk": [self.cx, self.cy],
+            "size": self.size,
+            "origin": [ox, oy],
+            "typeNames": list(ROOM_TYPES),
+            "x": xs,
+            "y": ys,
+            "types": types,
+            "edges": edges,
+            "doors": [
+                {"x": x + ox, "y": y + oy, "side": side,
+                 "chunk": [self.cx + SIDES[side][1][0], self.cy + SIDES[side][1][1]]}
+                for side, (x, y) in self.doors.items()
+            ]
+        }
+
+    def nbytes(self) -> int:
+        """Rough memory footprint, used to bound the chunk cache"""
+        return 2 * len(self.grid.types) + 8 * len(self.grid)
+
+def _carve(grid: DungeonGrid, start: Tuple[int, int], end: Tuple[int, int], vertical_first: bool) -> None:
+    """Straight-then-turn corridor of linked rooms from start to end"""
+    x, y = start
+    for vertical in ((True, False) if vertical_first else (False, True)):
+        while (y if vertical else x) != (end[1] if vertical else end[0]):
+            if vertical:
+                nx, ny = x, y + (1 if end[1] > y else -1)
+            else:
+                nx, ny = x + (1 if end[0] > x else -1), y
+            grid.add_room(nx, ny)
+            grid.connect(x, y, nx, ny)
+            x, y = nx, ny
+
+def _grow_clipped(grid: DungeonGrid, start: Tuple[int, int], ops, size: int) -> None:
+    """Turtle interpretation that prunes a branch once it leaves the chunk.
+
+    After the first step outside, the rest of that bracketed branch only moves
+    the turtle, so every room created is still linked back to the hub.
+    """
+    x, y = start
+    heading = 0
+    alive = True
+    stack: List[Tuple[int, int, int, bool]] = []
+    for op in ops:
+        if op == OP_FORWARD:
+            dx, dy = DIRECTION_VECTORS[heading]
+            nx, ny = x + dx, y + dy
+            if alive:
+                if 0 <= nx < size and 0 <= ny < size:
+                    if grid.add_room(nx, ny):
+                        grid.connect(x, y, nx, ny)
+                else:
+                    alive = False
+            x, y = nx, ny
+        elif op == OP_RIGHT:
+            heading = (heading + 1) & 3
+        elif op == OP_LEFT:
+            heading = (heading - 1) & 3
+        elif op == OP_PUSH:
+            stack.append((x, y, heading, alive))
+        elif op == OP_POP:
+            x, y, heading, alive = stack.pop()
+
+def generate_chunk(world_seed: int, cx: int, cy: int, size: int = 16, iterations: int = 4) -> DungeonChunk:
+    """Generate one chunk; the same arguments always give the same chunk"""
+    rng = random.Random(f"{world_seed}:chunk:{cx}:{cy}")
+    grid = DungeonGrid(0, 0, size, size)
+    hub = (size // 2, size // 2)
+    grid.add_room(hub[0], hub[1], "entrance" if (cx, cy) == (0, 0) else "normal")
+
+    # doors shared with the four neighbours, each carved back to the hub
+    doors = {
+        'east': (size - 1, border_door(world_seed, cx, cy, 'e', size)),
+        'south': (border_door(world_seed, cx, cy, 's', size), size - 1),
+        'west': (0, border_door(world_seed, cx - 1, cy, 'e', size)),
+        'north': (border_door(world_seed, cx, cy - 1, 's', size), 0),
+    }
+    for side, door in doors.items():
+        _carve(grid, hub, door, vertical_first=side in ('east', 'west'))
+        grid.masks[grid.index(*door)] |= SIDES[side][0]
+
+    # L-system branches grown from the hub, clipped to the chunk
+    generator = DungeonLSystem(rng=rng)
+    _grow_clipped(grid, hub, generator.opcodes(iterations, streaming=True), size)
+
+    # treasure and monster rooms, same proportions as DungeonLSystem
+    normal = TYPE_CODES['normal']
+    door_cells = set(doors.values())
+    normal_rooms = [(x, y) for x, y in zip(grid.xs, grid.ys)
+                    if grid.types[grid.index(x, y)] == normal and (x, y) not in door_cells]
+    treasure_count = max(1, len(normal_rooms) // 10)
+    monster_count = max(1, len(normal_rooms) // 5)
+    picks = rng.sample(normal_rooms, min(len(normal_rooms), treasure_count + monster_count))
+    for i, (x, y) in enumerate(picks):
+        grid.set_type(x, y, "treasure" if i < treasure_count else "monster")
+
+    observe("rooms", len(grid))
+    return DungeonChunk(cx, cy, size, grid, doors)
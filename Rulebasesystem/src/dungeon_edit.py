@@ -0,0 +1,194 @@
+import random
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from .dungeon_grid import DistanceIndex, NEIGHBOR_BITS, TYPE_CODES
+from .dungeon_lsystem import DungeonLSystem, DIRECTION_VECTORS, OP_FORWARD, OP_RIGHT, OP_LEFT, OP_PUSH, OP_POP
+from .dungeon_session import DungeonSession
+from .dungeon_visualizer import DungeonVisualizer
+
+# Same proportions _add_special_rooms aims for, drawn per new room
+TREASURE_CHANCE = 0.1
+MONSTER_CHANCE = 0.2
+
+def _subtree(grid, distances: DistanceIndex, root: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """Grid cells grown from `root` (not including it), found by walking away from the entrance"""
+    ox, oy = distances.offset
+    found = []
+    queue = deque([root])
+    while queue:
+        x, y = queue.popleft()
+        d = distances[(x + ox, y + oy)]
+        mask = grid.masks[grid.index(x, y)]
+        for dx, dy, bit in NEIGHBOR_BITS:
+            child = (x + dx, y + dy)
+            if mask & bit and distances[(child[0] + ox, child[1] + oy)] == d + 1:
+                found.append(child)
+                queue.append(child)
+    return found
+
+def _grow_branch(grid, start: Tuple[int, int], heading: int, ops) -> List[Tuple[int, int]]:
+    """Interpret opcodes from `start`, only into free cells; returns the new rooms in order.
+
+    A branch that runs into a room outside itself is pruned there, like a chunk
+    border, so the new rooms stay a subtree of `start`.
+    """
+    own = {start}
+    added = []
+    x, y = start
+    alive = True
+    stack = []
+    for op in ops:
+        if op == OP_FORWARD:
+            dx, dy = DIRECTION_VECTORS[heading]
+            nx, ny = x + dx, y + dy
+            if alive:
+                if grid.add_room(nx, ny):
+                    grid.connect(x, y, nx, ny)
+                    own.add((nx, ny))
+                    added.append((nx, ny))
+                elif (nx, ny) not in own:
+                    alive = False
+            x, y = nx, ny
+        elif op == OP_RIGHT:
+            heading = (heading + 1) & 3
+        elif op == OP_LEFT:
+            heading = (heading - 1) & 3
+        elif op == OP_PUSH:
+            stack.append((x, y, heading, alive))
+        elif op == OP_POP:
+            x, y, heading, alive = stack.pop()
+    return added
+
+def reroll_branch(session: DungeonSession, pos: Tuple[int, int], depth: Optional[int] = None,
+                  seed: Optional[int] = None) -> Dict:
+    """Regrow everything beyond the room at `pos` and return what changed.
+
+    The rooms grown from `pos` are removed and a fresh L-system branch is grown
+    from it, continuing away from the entrance. Only the new rooms get special
+    types, and only descriptions of rooms next to the edit are dropped (they
+    are regenerated on the next visit). The work is proportional to the old
+    and new branch, apart from compacting the grid's room list.
+
+    Returns the removed positions, the added and changed rooms with their SVG
+    markup, the connection path segments to remove and add, the descriptions
+    that were invalidated and the SVG viewBox covering the edited dungeon.
+    """
+    rooms = session.rooms
+    grid = rooms.grid
+    ox, oy = rooms.offset
+    distances = session.distances
+    gx, gy = pos[0] - ox, pos[1] - oy
+    if pos == session.entrance_pos:
+        raise ValueError("The entrance cannot be rerolled; generate a new dungeon instead")
+    visualizer = DungeonVisualizer(cell_size=session.cell_size)
+
+    def view(cell: Tuple[int, int]) -> Tuple[int, int]:
+        return cell[0] + ox, cell[1] + oy
+
+    def key(cell: Tuple[int, int]) -> str:
+        x, y = view(cell)
+        return f"{x},{y}"
+
+    # old branch: its rooms and every connection inside it or up to `pos`
+    removed = _subtree(grid, distances, (gx, gy))
+    removed_set = set(removed)
+    old_links = []
+    for x, y in removed:
+        mask = grid.masks[grid.index(x, y)]
+        for dx, dy, bit in NEIGHBOR_BITS[:2]:
+            if mask & bit:
+                old_links.append(((x, y), (x + dx, y + dy)))
+        for dx, dy, bit in NEIGHBOR_BITS[2:]:
+            if mask & bit and (x + dx, y + dy) not in removed_set:
+                old_links.append(((x, y), (x + dx, y + dy)))
+    exit_removed = any(grid.types[grid.index(x, y)] == TYPE_CODES['exit'] for x, y in removed)
+    for cell in removed:
+        distances.assign(view(cell), -1)
+    grid.remove_rooms(removed)
+    session.grammar.story_state['revealed_rooms'].difference_update(view(cell) for cell in removed)
+    session.tiles = None  # rendered tiles show the old branch
+
+    # new branch, heading away from the room `pos` was grown from
+    base = distances[pos]
+    heading = 0
+    for px, py in grid.neighbors(gx, gy):
+        if distances[view((px, py))] == base - 1:
+            heading = DIRECTION_VECTORS.index((gx - px, gy - py))
+            break
+    session.rerolls += 1
+    rng = random.Random(seed if seed is not None else f"{session.seed}:reroll:{pos[0]},{pos[1]}:{session.rerolls}")
+    ops = DungeonLSystem(rng=rng).opcodes(depth or session.iterations, streaming=True, axiom='F')
+    added = _grow_branch(grid, (gx, gy), heading, ops)
+
+    # distances of the new rooms; a resized grid needs a fresh index
+    if distances.stale:
+        fresh = DistanceIndex(grid, distances.root, distances.offset)
+        distances.__dict__.update(fresh.__dict__)
+    added_set = set(added)
+    if not distances.stale:
+        queue = deque([(gx, gy)])
+        while queue:
+            x, y = queue.popleft()
+            d = distances[view((x, y))]
+            for nx, ny in grid.neighbors(x, y):
+                if (nx, ny) in added_set and distances.get(view((nx, ny)), -1) < 0:
+                    distances.assign(view((nx, ny)), d + 1)
+                    queue.append((nx, ny))
+
+    # special rooms for the new branch only
+    changed: Set[Tuple[int, int]] = {(gx, gy)}
+    for cell in added:
+        roll = rng.random()
+        if roll < TREASURE_CHANCE:
+            grid.set_type(*cell, "treasure")
+        elif roll < TREASURE_CHANCE + MONSTER_CHANCE:
+            grid.set_type(*cell, "monster")
+    if exit_removed or grid.get_type(gx, gy) == 'exit':
+        target = max(added, key=lambda cell: distances[view(cell)], default=(gx, gy))
+        if grid.get_type(gx, gy) == 'exit' and target != (gx, gy):
+            grid.set_type(gx, gy, "normal")
+        grid.set_type(*target, "exit")
+        changed.add(target)
+
+    # descriptions mention neighbouring rooms, so drop them around the edit
+    touched = set(removed) | set(added) | {(gx, gy)}
+    invalidated = set()
+    for x, y in touched:
+        for dx, dy, _ in NEIGHBOR_BITS + ((0, 0, 0),):
+            cell = (x + dx, y + dy)
+            if view(cell) in session.descriptions:
+                del session.descriptions[view(cell)]
+                invalidated.add(cell)
+
+    new_links = [((x, y), (nx, ny)) for x, y in added for nx, ny in grid.neighbors(x, y)
+                 if (nx, ny) not in added_set or (nx, ny) > (x, y)]
+
+    def room(cell: Tuple[int, int]) -> Dict:
+        room_type = grid.get_type(*cell)
+        return {"type": room_type, "distance": distances[view(cell)],
+                "svg": visualizer.room_svg(*view(cell), room_type, session.compact)}
+
+    # a cell of the old branch that the new one reuses is listed as added, not removed
+    return {
+        "dungeonId": session.id,
+        "reroll": session.rerolls,
+        "removed": [key(cell) for cell in removed if cell not in added_set],
+        "added": {key(cell): room(cell) for cell in added},
+        "changed": {key(cell): room(cell) for cell in changed if cell not in added_set},
+        "connections": {
+            "removed": [visualizer.connection_svg(view(a), view(b)) for a, b in old_links],
+            "added": [visualizer.connection_svg(view(a), view(b)) for a, b in new_links]
+        },
+        "invalidatedDescriptions": sorted(key(cell) for cell in invalidated),
+        "viewBox": _view_box(grid, rooms.offset, session.cell_size),
+        "totalRooms": len(grid)
+    }
+
+def _view_box(grid, offset: Tuple[int, int], cell_size: int) -> str:
+    """viewBox covering every room; '0 0 w h' like render_svg while no room is left or above (0, 0)"""
+    min_x = min(0, grid.room_min_x + offset[0]) * cell_size
+    min_y = min(0, grid.room_min_y + offset[1]) * cell_size
+    max_x = (grid.room_max_x + offset[0] + 2) * cell_size
+    max_y = (grid.room_max_y + offset[1] + 2) * cell_size
+    return f"{min_x} {min_y} {max_x - min_x} {max_y - min_y}"
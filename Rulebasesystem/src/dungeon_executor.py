@@ -0,0 +1,105 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+class ExecutorBusy(Exception):
+    """Raised when the generation queue is already full"""
+
+class GenerationTimeout(Exception):
+    """Raised when a generation does not finish within the request timeout"""
+
+class GenerationExecutor:
+    """Runs CPU-bound generation off the event loop with backpressure.
+
+    Modes:
+      inline  - run in the event loop (old behaviour, no timeout)
+      thread  - thread pool; keeps the loop responsive
+      process - process pool; uses every core
+
+    At most `workers` generations run at once and at most `max_queue` more
+    may wait. Anything beyond that is rejected with ExecutorBusy instead of
+    piling up latency for everyone.
+    """
+
+    def __init__(self, mode: str = "thread", workers: Optional[int] = None,
+                 max_queue: int = 32, timeout: float = 30.0):
+        if mode not in ("inline", "thread", "process"):
+            raise ValueError(f"Unknown executor mode: {mode}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.timeout = timeout
+
+        self._pool: Optional[Executor] = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dungeon")
+        elif mode == "process":
+            # imported here: multiprocessing costs several ms of startup in the other modes
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+        # Counters
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        """Run fn(*args) on the pool, enforcing queue depth and timeout"""
+        if self.in_flight >= self.workers + self.max_queue:
+            self.rejected += 1
+            raise ExecutorBusy(f"{self.in_flight} generations already in progress")
+
+        self.in_flight += 1
+        if self._pool is None:
+            try:
+                result = fn(*args)
+            finally:
+                self.in_flight -= 1
+            self.completed += 1
+            return result
+
+        # the slot is released when the job itself ends, not when the caller stops
+        # waiting: a timed-out job that is already running keeps its worker busy
+        # and must still count against the queue. One that has not started yet
+        # is cancelled in the pool, which releases its slot straight away.
+        loop = asyncio.get_running_loop()
+        job = self._pool.submit(fn, *args)
+        job.add_done_callback(lambda _: self._release(loop))
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(job), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise GenerationTimeout(f"Generation took longer than {self.timeout}s")
+
+        self.completed += 1
+        return result
+
+    def _release(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Done callback of a pool job; runs on a pool thread, so hand over to the loop"""
+        try:
+            loop.call_soon_threadsafe(self._finish_job)
+        except RuntimeError:
+            pass  # loop already closed at shutdown
+
+    def _finish_job(self) -> None:
+        self.in_flight -= 1
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            # worker processes must get their stop message before this process exits,
+            # or they are left behind waiting for work; threads die with the process
+            self._pool.shutdown(wait=self.mode == "process", cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "workers": self.workers,
+            "maxQueue": self.max_queue,
+            "timeout": self.timeout,
+            "inFlight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts
+        }
@@ -1,6 +1,8 @@
 import random
-from typing import Dict, List, Tuple, Optional
+from types import MappingProxyType
+from typing import Dict, List, Tuple, Optional, Mapping, Any
 from enum import Enum
+from .dungeon_grid import graph_distances
 
 class DungeonTheme(Enum):
     ANCIENT_TEMPLE = "Ancient Temple"
@@ -8,23 +10,22 @@ class DungeonTheme(Enum):
     CURSED_CRYPT = "Cursed Crypt"
     DRAGON_LAIR = "Dragon's Lair"
 
-class DungeonGrammar:
-    def __init__(self):
-        self.current_theme = random.choice(list(DungeonTheme))
-        
-        # Story tracking
-        self.story_state = {
-            'main_treasure': random.choice(['the Sacred Chalice', 'the Eternal Flame', 'the Crystal of Power']),
-            'main_villain': None,
-            'discovered_clues': [],
-            'treasure_count': 0,
-            'last_monster': None,
-            'quest_progress': 0,
-            'revealed_rooms': set()  # Track which rooms have been explored
-        }
-        
-        # Theme-specific content
-        self.themes = {
+def _freeze(value: Any) -> Any:
+    """Turn nested dicts/lists into read-only mappings and tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+# Phrase tables are built once at import and shared by every grammar instance
+
+THEME_CHOICES = tuple(DungeonTheme)
+
+MAIN_TREASURES = ('the Sacred Chalice', 'the Eternal Flame', 'the Crystal of Power')
+
+# Theme-specific content
+THEMES = _freeze({
             DungeonTheme.ANCIENT_TEMPLE: {
                 'description': [
                     "An ancient temple dedicated to forgotten gods, its halls still resonating with mystical energy.",
@@ -65,10 +66,10 @@ class DungeonGrammar:
                 'objects': ["treasure hoards", "dragon eggs", "melted weapons"],
                 'enemies': ["young dragons", "drake handlers", "fire elementals"]
             }
-        }
+        })
 
-        # Room type descriptions
-        self.rules = {
+# Room type descriptions
+ROOM_RULES = _freeze({
             'entrance': {
                 'description': [
                     "A grand archway marks the entrance, ancient runes pulsing with faint light.",
@@ -141,23 +142,73 @@ class DungeonGrammar:
                     "A shaft of natural light pierces the darkness."
                 ]
             }
+        })
+
+# Random events; the discovery clue is filled in with the main treasure
+EVENT_TYPES = ('trap', 'discovery')
+EVENTS = _freeze({
+    'trap': {
+        'trigger': "You step on a loose tile",
+        'consequence': ["arrows shoot from the walls", "the floor suddenly gives way", "poisonous gas begins to spread"],
+        'solution': ["you quickly jump back", "block it with your shield", "find the mechanism to disable it"]
+    },
+    'discovery': {
+        'trigger': "You find the remains of a previous explorer",
+        'items': ["a weathered journal", "a mysterious map", "a rusted key"]
+    }
+})
+
+# Monster and treasure lists resolved per theme ahead of time
+THEME_MONSTERS = {theme: ROOM_RULES['monster']['monster_type'][theme] for theme in DungeonTheme}
+THEME_TREASURES = {theme: ROOM_RULES['treasure']['treasure_type'][theme] for theme in DungeonTheme}
+
+# Hints about unexplored neighbours
+NEIGHBOR_HINTS = {
+    'monster': "Menacing sounds echo from nearby",
+    'treasure': "A faint golden glow seeps through one of the exits",
+    'exit': "A fresh breeze flows from one direction"
+}
+NEIGHBOR_OFFSETS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+
+class DungeonGrammar:
+    def __init__(self, rng: Optional[random.Random] = None):
+        # Per-instance random source so a seed reproduces the same descriptions
+        self.rng = rng if rng is not None else random.Random()
+        self.current_theme = self.rng.choice(THEME_CHOICES)
+        
+        # Story tracking
+        self.story_state = {
+            'main_treasure': self.rng.choice(MAIN_TREASURES),
+            'main_villain': None,
+            'discovered_clues': [],
+            'treasure_count': 0,
+            'last_monster': None,
+            'quest_progress': 0,
+            'revealed_rooms': set()  # Track which rooms have been explored
         }
 
-    def get_connected_rooms_info(self, pos: Tuple[int, int], rooms: Dict) -> List[str]:
+    # Shared read-only tables; properties so pickled grammars (sessions sent
+    # back from worker processes) don't try to copy the frozen mappings
+    @property
+    def themes(self) -> Mapping:
+        return THEMES
+
+    @property
+    def rules(self) -> Mapping:
+        return ROOM_RULES
+
+    def get_connected_rooms_info(self, pos: Tuple[int, int], rooms: Mapping) -> List[str]:
         """Get information about connected rooms"""
         connected_info = []
+        revealed = self.story_state['revealed_rooms']
         x, y = pos
         
-        for dx, dy in [(0,1), (1,0), (0,-1), (-1,0)]:
+        for dx, dy in NEIGHBOR_OFFSETS:
             check_pos = (x + dx, y + dy)
-            if check_pos in rooms and check_pos not in self.story_state['revealed_rooms']:
-                room = rooms[check_pos]
-                if room.type == 'monster':
-                    connected_info.append("Menacing sounds echo from nearby")
-                elif room.type == 'treasure':
-                    connected_info.append("A faint golden glow seeps through one of the exits")
-                elif room.type == 'exit':
-                    connected_info.append("A fresh breeze flows from one direction")
+            if check_pos in rooms and check_pos not in revealed:
+                hint = NEIGHBOR_HINTS.get(rooms[check_pos].type)
+                if hint:
+                    connected_info.append(hint)
         
         return connected_info
 
@@ -168,8 +219,7 @@ class DungeonGrammar:
         if room_type == 'monster':
             if not self.story_state['main_villain']:
                 # get monster_type
-                monster_list = self.rules[room_type]['monster_type'][self.current_theme]
-                self.story_state['main_villain'] = random.choice(monster_list)
+                self.story_state['main_villain'] = self.rng.choice(THEME_MONSTERS[self.current_theme])
                 return f"Legends speak of {self.story_state['main_villain']} guarding {self.story_state['main_treasure']}"
         
         elif room_type == 'treasure':
@@ -183,14 +233,14 @@ class DungeonGrammar:
 
     def generate_dungeon_overview(self) -> str:
         """Generate an overview description of the dungeon"""
-        theme_data = self.themes[self.current_theme]
+        theme_data = THEMES[self.current_theme]
         overview = f"""
 Welcome to the {self.current_theme.value}!
 
-{random.choice(theme_data['description'])}
+{self.rng.choice(theme_data['description'])}
 
-The atmosphere here is {random.choice(theme_data['atmosphere'])}, with {random.choice(theme_data['objects'])} scattered throughout.
-Be wary of {random.choice(theme_data['enemies'])} that lurk in the shadows.
+The atmosphere here is {self.rng.choice(theme_data['atmosphere'])}, with {self.rng.choice(theme_data['objects'])} scattered throughout.
+Be wary of {self.rng.choice(theme_data['enemies'])} that lurk in the shadows.
 
 Legend speaks of {self.story_state['main_treasure']} hidden within these halls...
 
@@ -209,80 +259,39 @@ Legend speaks of {self.story_state['main_treasure']} hidden within these halls..
 
     def generate_event(self) -> str:
         """Generate a random event description"""
-        events = {
-            'trap': {
-                'trigger': "You step on a loose tile",
-                'consequence': ["arrows shoot from the walls", "the floor suddenly gives way", "poisonous gas begins to spread"],
-                'solution': ["you quickly jump back", "block it with your shield", "find the mechanism to disable it"]
-            },
-            'discovery': {
-                'trigger': "You find the remains of a previous explorer",
-                'items': ["a weathered journal", "a mysterious map", "a rusted key"],
-                'clue': f"Their notes mention {self.story_state['main_treasure']}"
-            }
-        }
-        
-        event_type = random.choice(list(events.keys()))
-        event = events[event_type]
+        event_type = self.rng.choice(EVENT_TYPES)
+        event = EVENTS[event_type]
         
         if event_type == 'trap':
-            return f"CAUTION: {event['trigger']} and {random.choice(event['consequence'])}, but {random.choice(event['solution'])}."
+            return f"CAUTION: {event['trigger']} and {self.rng.choice(event['consequence'])}, but {self.rng.choice(event['solution'])}."
         else:
-            return f"DISCOVERY: {event['trigger']} holding {random.choice(event['items'])}. {event['clue']}."
+            clue = f"Their notes mention {self.story_state['main_treasure']}"
+            return f"DISCOVERY: {event['trigger']} holding {self.rng.choice(event['items'])}. {clue}."
 
-    def generate_room_description(self, room_type: str, pos: Tuple[int, int], entrance_pos: Tuple[int, int], rooms: Dict) -> str:
-        """Generate description for a specific room, considering theme and context"""
-        if room_type not in self.rules:
-            return "A plain chamber."
-            
-        # Calculate distance from entrance
-        distance = abs(pos[0] - entrance_pos[0]) + abs(pos[1] - entrance_pos[1])
+    def _compose_description(self, room_type: str, pos: Tuple[int, int], distance: int,
+                             connected_info: List[str]) -> str:
+        """Build one room description; draws from the RNG in a fixed order"""
+        choice = self.rng.choice
         distance_desc = self.generate_description_by_distance(distance)
         
         # Generate base description
-        room_rules = self.rules[room_type]
-        description = random.choice(room_rules['description'])
-        details = random.choice(room_rules['details'])
+        room_rules = ROOM_RULES[room_type]
+        description = choice(room_rules['description'])
+        details = choice(room_rules['details'])
         
         # Add theme-specific content for special rooms
         if room_type == 'monster':
-            print(f"Current theme: {self.current_theme}, Type: {type(self.current_theme)}")
-            print(f"Monster type keys: {room_rules['monster_type'].keys()}")
-            
-            if 'monster_type' not in room_rules:
-                print(f"Error: 'monster_type' not found in room_rules for room type {room_type}")
-                return f"{description} {distance_desc}. {details} A mysterious creature lurks within."
-            
-            try:
-                # double_check current_theme
-                current_theme = (
-                    self.current_theme if isinstance(self.current_theme, DungeonTheme)
-                    else DungeonTheme(self.current_theme)
-                )
-                
-                monster_list = room_rules['monster_type'][current_theme]
-                if not monster_list:
-                    print(f"Warning: monster_type list is empty for theme {current_theme}")
-                    monster = "a mysterious creature"
-                else:
-                    monster = random.choice(monster_list)
-                full_desc = f"{description} {distance_desc}. {details} {monster} lurks within."
-            except (KeyError, ValueError) as e:
-                print(f"Error accessing monster_type: {e}")
-                full_desc = f"{description} {distance_desc}. {details} A mysterious creature lurks within."
+            monster = choice(THEME_MONSTERS[self.current_theme])
+            full_desc = f"{description} {distance_desc}. {details} {monster} lurks within."
         elif room_type == 'treasure':
-            try:
-                treasure = random.choice(room_rules['treasure_type'][self.current_theme])
-                full_desc = f"{description} {distance_desc}. {details} In the center, {treasure} draws your attention."
-            except (KeyError, IndexError):
-                full_desc = f"{description} {distance_desc}. {details} In the center, something valuable catches your eye."
+            treasure = choice(THEME_TREASURES[self.current_theme])
+            full_desc = f"{description} {distance_desc}. {details} In the center, {treasure} draws your attention."
         else:
             full_desc = f"{description} {distance_desc}. {details}"
         
         # Add connected rooms info
-        connected_info = self.get_connected_rooms_info(pos, rooms)
         if connected_info:
-            full_desc += f" {random.choice(connected_info)}."
+            full_desc += f" {choice(connected_info)}."
         
         # Add story progress
         story_update = self.update_story_progress(room_type, pos)
@@ -290,15 +299,58 @@ Legend speaks of {self.story_state['main_treasure']} hidden within these halls..
             full_desc += f" {story_update}."
         
         # Add random event with 30% chance
-        if random.random() < 0.3:
+        if self.rng.random() < 0.3:
             full_desc += " " + self.generate_event()
             
         return full_desc
 
-    def generate_dungeon_descriptions(self, rooms: Dict) -> Dict[tuple, str]:
-        """Generate descriptions for all rooms in the dungeon"""
-        entrance_pos = next((pos for pos, room in rooms.items() if room.type == 'entrance'), (0, 0))
+    def generate_room_description(self, room_type: str, pos: Tuple[int, int], entrance_pos: Tuple[int, int], rooms: Mapping,
+                                  distances: Optional[Mapping] = None) -> str:
+        """Generate description for a specific room, considering theme and context
+
+        `distances` maps positions to corridor distance from the entrance; without
+        it the straight-line (Manhattan) distance is used.
+        """
+        if room_type not in ROOM_RULES:
+            return "A plain chamber."
+            
+        # Calculate distance from entrance
+        if distances is not None:
+            distance = distances[pos]
+        else:
+            distance = abs(pos[0] - entrance_pos[0]) + abs(pos[1] - entrance_pos[1])
+        return self._compose_description(room_type, pos, distance, self.get_connected_rooms_info(pos, rooms))
+
+    def describe_rooms(self, rooms: Mapping, entrance_pos: Optional[Tuple[int, int]] = None,
+                       distances: Optional[Mapping] = None) -> Dict[Tuple[int, int], str]:
+        """Describe every room in one pass.
+
+        Gives the same text as calling generate_room_description on each room in
+        iteration order, but reads every room type only once. Distances come from
+        `distances` (e.g. the generator's DistanceIndex), or from one BFS here.
+        """
+        types = {pos: room.type for pos, room in rooms.items()}
+        if entrance_pos is None:
+            entrance_pos = next((pos for pos, room_type in types.items() if room_type == 'entrance'), (0, 0))
+        if distances is None:
+            distances = graph_distances(rooms, entrance_pos)
+        revealed = self.story_state['revealed_rooms']
+
         descriptions = {}
-        for pos, room in rooms.items():
-            descriptions[pos] = self.generate_room_description(room.type, pos, entrance_pos, rooms)
-        return descriptions
\ No newline at end of file
+        for pos, room_type in types.items():
+            if room_type not in ROOM_RULES:
+                descriptions[pos] = "A plain chamber."
+                continue
+            x, y = pos
+            connected_info = []
+            for dx, dy in NEIGHBOR_OFFSETS:
+                check_pos = (x + dx, y + dy)
+                hint = NEIGHBOR_HINTS.get(types.get(check_pos))
+                if hint and check_pos not in revealed:
+                    connected_info.append(hint)
+            descriptions[pos] = self._compose_description(room_type, pos, distances[pos], connected_info)
+        return descriptions
+
+    def generate_dungeon_descriptions(self, rooms: Mapping) -> Dict[tuple, str]:
+        """Generate descriptions for all rooms in the dungeon"""
+        return self.describe_rooms(rooms)
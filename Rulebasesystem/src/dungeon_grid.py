@@ -0,0 +1,332 @@
+from array import array
+from collections import deque
+from collections.abc import Mapping
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+# Room type codes stored per cell; 0 marks an empty cell
+ROOM_TYPES = ('normal', 'entrance', 'exit', 'treasure', 'monster')
+TYPE_CODES = {name: code for code, name in enumerate(ROOM_TYPES, start=1)}
+EMPTY = 0
+
+# Adjacency bits: east, south, west, north
+NEIGHBOR_BITS = ((1, 0, 1), (0, 1, 2), (-1, 0, 4), (0, -1, 8))
+BIT_FOR_OFFSET = {(dx, dy): bit for dx, dy, bit in NEIGHBOR_BITS}
+OPPOSITE_BIT = {1: 4, 2: 8, 4: 1, 8: 2}
+
+class DungeonGrid:
+    """Dense dungeon layout: a type code and a 4-bit adjacency mask per cell.
+
+    The bounding box grows by doubling as rooms are added, and rooms are also
+    kept in creation order so iteration matches the old dict-of-Room layout.
+    """
+
+    def __init__(self, min_x: int = -4, min_y: int = -4, width: int = 8, height: int = 8):
+        self.min_x = min_x
+        self.min_y = min_y
+        self.width = width
+        self.height = height
+        self.types = bytearray(width * height)
+        self.masks = bytearray(width * height)
+
+        # Room coordinates in creation order
+        self.xs = array('i')
+        self.ys = array('i')
+
+        # Bounding box of the occupied cells
+        self.room_min_x = self.room_min_y = 0
+        self.room_max_x = self.room_max_y = -1
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def index(self, x: int, y: int) -> int:
+        """Cell index for a position, or -1 when it lies outside the grid"""
+        col = x - self.min_x
+        row = y - self.min_y
+        if 0 <= col < self.width and 0 <= row < self.height:
+            return row * self.width + col
+        return -1
+
+    def _grow(self, x: int, y: int) -> None:
+        """Enlarge the grid so (x, y) fits, at least doubling each axis that overflows"""
+        min_x, min_y = self.min_x, self.min_y
+        width, height = self.width, self.height
+        if x < min_x or x >= min_x + width:
+            new_min_x = min(min_x, x) - width // 2
+            new_width = max(min_x + width, x + 1) + width // 2 - new_min_x
+        else:
+            new_min_x, new_width = min_x, width
+        if y < min_y or y >= min_y + height:
+            new_min_y = min(min_y, y) - height // 2
+            new_height = max(min_y + height, y + 1) + height // 2 - new_min_y
+        else:
+            new_min_y, new_height = min_y, height
+
+        types = bytearray(new_width * new_height)
+        masks = bytearray(new_width * new_height)
+        col = min_x - new_min_x
+        for row in range(height):
+            start = (row + min_y - new_min_y) * new_width + col
+            types[start:start + width] = self.types[row * width:(row + 1) * width]
+            masks[start:start + width] = self.masks[row * width:(row + 1) * width]
+
+        self.min_x, self.min_y = new_min_x, new_min_y
+        self.width, self.height = new_width, new_height
+        self.types, self.masks = types, masks
+
+    def add_room(self, x: int, y: int, room_type: str = "normal") -> bool:
+        """Create a room; returns False if the cell is already occupied"""
+        i = self.index(x, y)
+        if i < 0:
+            self._grow(x, y)
+            i = self.index(x, y)
+        if self.types[i]:
+            return False
+
+        self.types[i] = TYPE_CODES[room_type]
+        if not self.xs:
+            self.room_min_x = self.room_max_x = x
+            self.room_min_y = self.room_max_y = y
+        else:
+            self.room_min_x = min(self.room_min_x, x)
+            self.room_max_x = max(self.room_max_x, x)
+            self.room_min_y = min(self.room_min_y, y)
+            self.room_max_y = max(self.room_max_y, y)
+        self.xs.append(x)
+        self.ys.append(y)
+        return True
+
+    def remove_rooms(self, cells: Iterable[Tuple[int, int]]) -> None:
+        """Delete rooms and every connection touching them"""
+        removed = set()
+        for x, y in cells:
+            i = self.index(x, y)
+            if i < 0 or not self.types[i]:
+                continue
+            mask = self.masks[i]
+            for dx, dy, bit in NEIGHBOR_BITS:
+                if mask & bit:
+                    self.masks[self.index(x + dx, y + dy)] &= ~OPPOSITE_BIT[bit] & 0xF
+            self.types[i] = EMPTY
+            self.masks[i] = 0
+            removed.add((x, y))
+        if not removed:
+            return
+
+        # keep the remaining rooms in creation order
+        kept = [(x, y) for x, y in zip(self.xs, self.ys) if (x, y) not in removed]
+        self.xs = array('i', [x for x, _ in kept])
+        self.ys = array('i', [y for _, y in kept])
+        if self.xs:
+            self.room_min_x, self.room_max_x = min(self.xs), max(self.xs)
+            self.room_min_y, self.room_max_y = min(self.ys), max(self.ys)
+        else:
+            self.room_min_x = self.room_min_y = 0
+            self.room_max_x = self.room_max_y = -1
+
+    def has_room(self, x: int, y: int) -> bool:
+        i = self.index(x, y)
+        return i >= 0 and self.types[i] != EMPTY
+
+    def connect(self, ax: int, ay: int, bx: int, by: int) -> None:
+        """Link two orthogonally adjacent rooms"""
+        bit = BIT_FOR_OFFSET[(bx - ax, by - ay)]
+        self.masks[self.index(ax, ay)] |= bit
+        self.masks[self.index(bx, by)] |= OPPOSITE_BIT[bit]
+
+    def get_type(self, x: int, y: int) -> str:
+        return ROOM_TYPES[self.types[self.index(x, y)] - 1]
+
+    def set_type(self, x: int, y: int, room_type: str) -> None:
+        self.types[self.index(x, y)] = TYPE_CODES[room_type]
+
+    def neighbors(self, x: int, y: int) -> List[Tuple[int, int]]:
+        """Connected neighbor positions, east/south/west/north order"""
+        mask = self.masks[self.index(x, y)]
+        return [(x + dx, y + dy) for dx, dy, bit in NEIGHBOR_BITS if mask & bit]
+
+    def size(self) -> Tuple[int, int]:
+        """Width and height of the occupied area"""
+        return self.room_max_x - self.room_min_x + 1, self.room_max_y - self.room_min_y + 1
+
+    def rooms(self, offset: Tuple[int, int] = (0, 0)) -> "GridRooms":
+        """Room-compatible mapping view; positions are shifted by `offset`"""
+        return GridRooms(self, offset)
+
+    def normalized(self) -> "GridRooms":
+        """View with the occupied area starting at (0, 0), without copying"""
+        return GridRooms(self, (-self.room_min_x, -self.room_min_y))
+
+class RoomView:
+    """Room-like accessor for one cell of a DungeonGrid"""
+    __slots__ = ('_grid', '_gx', '_gy', 'x', 'y')
+
+    def __init__(self, grid: DungeonGrid, gx: int, gy: int, offset: Tuple[int, int]):
+        self._grid = grid
+        self._gx = gx
+        self._gy = gy
+        self.x = gx + offset[0]
+        self.y = gy + offset[1]
+
+    @property
+    def type(self) -> str:
+        return self._grid.get_type(self._gx, self._gy)
+
+    @type.setter
+    def type(self, room_type: str) -> None:
+        self._grid.set_type(self._gx, self._gy, room_type)
+
+    @property
+    def connections(self) -> List[Tuple[int, int]]:
+        dx = self.x - self._gx
+        dy = self.y - self._gy
+        return [(nx + dx, ny + dy) for nx, ny in self._grid.neighbors(self._gx, self._gy)]
+
+    def __repr__(self) -> str:
+        return f"RoomView(x={self.x}, y={self.y}, type={self.type!r})"
+
+class GridRooms(Mapping):
+    """Read-only mapping of position -> RoomView, iterated in creation order"""
+
+    def __init__(self, grid: DungeonGrid, offset: Tuple[int, int] = (0, 0)):
+        self.grid = grid
+        self.offset = offset
+
+    def __getitem__(self, pos: Tuple[int, int]) -> RoomView:
+        gx, gy = pos[0] - self.offset[0], pos[1] - self.offset[1]
+        if not self.grid.has_room(gx, gy):
+            raise KeyError(pos)
+        return RoomView(self.grid, gx, gy, self.offset)
+
+    def __contains__(self, pos) -> bool:
+        return self.grid.has_room(pos[0] - self.offset[0], pos[1] - self.offset[1])
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        ox, oy = self.offset
+        return ((x + ox, y + oy) for x, y in zip(self.grid.xs, self.grid.ys))
+
+    def __len__(self) -> int:
+        return len(self.grid)
+
+class DistanceIndex(Mapping):
+    """Corridor distance from a root room to every room, from one BFS.
+
+    Maps position -> hop count (in the same shifted coordinates as a GridRooms
+    view). Every room is linked only to the room it was grown from, so the room
+    graph is a tree and walking towards the root from both ends gives the
+    shortest route between any two rooms without another traversal. After
+    changing the grid, patch the affected rooms with assign(), or build a new
+    index once the grid has been resized (see `stale`).
+    """
+
+    def __init__(self, grid: DungeonGrid, root: Tuple[int, int], offset: Tuple[int, int] = (0, 0)):
+        self.grid = grid
+        self.root = root
+        self.offset = offset
+        self._min_x, self._min_y = grid.min_x, grid.min_y
+        self._width, self._height = grid.width, grid.height
+
+        # hop count per cell, -1 for empty or unreachable cells
+        dist = array('i', [-1]) * len(grid.types)
+        steps = ((1, 1), (2, grid.width), (4, -1), (8, -grid.width))
+        masks = grid.masks
+        start = grid.index(*root)
+        dist[start] = 0
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            mask = masks[cell]
+            next_dist = dist[cell] + 1
+            for bit, step in steps:
+                if mask & bit and dist[cell + step] < 0:
+                    dist[cell + step] = next_dist
+                    queue.append(cell + step)
+        self.dist = dist
+
+    def _cell(self, x: int, y: int) -> int:
+        col = x - self.offset[0] - self._min_x
+        row = y - self.offset[1] - self._min_y
+        if 0 <= col < self._width and 0 <= row < self._height:
+            return row * self._width + col
+        return -1
+
+    def __getitem__(self, pos: Tuple[int, int]) -> int:
+        cell = self._cell(pos[0], pos[1])
+        if cell < 0 or self.dist[cell] < 0:
+            raise KeyError(pos)
+        return self.dist[cell]
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        ox, oy = self.offset
+        return ((x + ox, y + oy) for x, y in zip(self.grid.xs, self.grid.ys)
+                if self.dist[self._cell(x + ox, y + oy)] >= 0)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    @property
+    def stale(self) -> bool:
+        """True once the grid has been resized, after which cells no longer line up"""
+        grid = self.grid
+        return (grid.min_x, grid.min_y, grid.width, grid.height) != (self._min_x, self._min_y, self._width, self._height)
+
+    def assign(self, pos: Tuple[int, int], distance: int) -> None:
+        """Set one room's distance after an edit of the grid; -1 forgets the room"""
+        self.dist[self._cell(pos[0], pos[1])] = distance
+
+    def shifted(self, offset: Tuple[int, int]) -> "DistanceIndex":
+        """Same distances addressed with another coordinate offset"""
+        index = DistanceIndex.__new__(DistanceIndex)
+        index.__dict__.update(self.__dict__)
+        index.offset = offset
+        return index
+
+    def normalized(self) -> "DistanceIndex":
+        """Distances addressed like grid.normalized()"""
+        return self.shifted((-self.grid.room_min_x, -self.grid.room_min_y))
+
+    def farthest(self) -> Tuple[int, int]:
+        """Reachable room with the largest distance; the earliest created wins ties"""
+        best, best_dist = None, -1
+        for pos in self:
+            d = self[pos]
+            if d > best_dist:
+                best, best_dist = pos, d
+        return best
+
+    def path(self, start: Tuple[int, int], end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """Shortest route between two rooms, both ends included"""
+        def parent(pos: Tuple[int, int]) -> Tuple[int, int]:
+            d = self[pos]
+            mask = self.grid.masks[self._cell(*pos)]
+            for dx, dy, bit in NEIGHBOR_BITS:
+                step = (pos[0] + dx, pos[1] + dy)
+                if mask & bit and self[step] == d - 1:
+                    return step
+            raise KeyError(pos)
+
+        head, tail = [start], [end]
+        a, b = start, end
+        while self[a] > self[b]:
+            a = parent(a)
+            head.append(a)
+        while self[b] > self[a]:
+            b = parent(b)
+            tail.append(b)
+        while a != b:
+            a, b = parent(a), parent(b)
+            head.append(a)
+            tail.append(b)
+        return head + tail[-2::-1]
+
+def graph_distances(rooms: Mapping, start: Tuple[int, int]) -> Dict[Tuple[int, int], int]:
+    """BFS hop counts over Room.connections for any position -> Room mapping"""
+    distances = {start: 0}
+    queue = deque([start])
+    while queue:
+        pos = queue.popleft()
+        for neighbor in rooms[pos].connections:
+            if neighbor not in distances:
+                distances[neighbor] = distances[pos] + 1
+                queue.append(neighbor)
+    return distances
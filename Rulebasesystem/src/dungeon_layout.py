@@ -0,0 +1,106 @@
+import struct
+import sys
+from array import array
+from typing import Dict, Tuple
+
+from .dungeon_grid import GridRooms, ROOM_TYPES
+from .dungeon_grammar import DungeonGrammar, THEME_CHOICES, MAIN_TREASURES
+
+# Binary layout: header, then x and y (uint16), type codes (uint8) and
+# edges as pairs of room indices (uint32), all little-endian
+LAYOUT_MAGIC = b"DGL1"
+LAYOUT_VERSION = 1
+LAYOUT_HEADER = struct.Struct("<4sBBBBQII")  # magic, version, iterations, theme, treasure, seed, rooms, edges
+
+def layout_arrays(rooms: GridRooms) -> Tuple[array, array, bytearray, array]:
+    """Room coordinates, type codes and edge list of a grid view, in creation order"""
+    grid = rooms.grid
+    ox, oy = rooms.offset
+    xs, ys = array('H'), array('H')
+    types = bytearray()
+
+    # cell -> room index, so edges can refer to rooms by position in the list
+    room_at = array('i', [-1]) * len(grid.types)
+    for i, (x, y) in enumerate(zip(grid.xs, grid.ys)):
+        cell = grid.index(x, y)
+        room_at[cell] = i
+        xs.append(x + ox)
+        ys.append(y + oy)
+        types.append(grid.types[cell])
+
+    # each connection once, from its west/north end
+    edges = array('I')
+    for i, (x, y) in enumerate(zip(grid.xs, grid.ys)):
+        cell = grid.index(x, y)
+        mask = grid.masks[cell]
+        if mask & 1:
+            edges.extend((i, room_at[cell + 1]))
+        if mask & 2:
+            edges.extend((i, room_at[cell + grid.width]))
+    return xs, ys, types, edges
+
+def layout_dict(rooms: GridRooms, grammar: DungeonGrammar, seed: int, iterations: int, overview: str) -> Dict:
+    """JSON layout payload: flat arrays instead of SVG and per-room strings"""
+    xs, ys, types, edges = layout_arrays(rooms)
+    width, height = rooms.grid.size()
+    return {
+        "format": "layout",
+        "seed": seed,
+        "iterations": iterations,
+        "width": width,
+        "height": height,
+        "typeNames": list(ROOM_TYPES),
+        "x": xs.tolist(),
+        "y": ys.tolist(),
+        "types": list(types),
+        "edges": edges.tolist(),
+        "overview": overview,
+        "theme": grammar.current_theme.value,
+        "mainTreasure": grammar.story_state['main_treasure']
+    }
+
+def encode_layout_binary(rooms: GridRooms, grammar: DungeonGrammar, seed: int, iterations: int) -> bytes:
+    """Pack a layout into the compact binary format"""
+    xs, ys, types, edges = layout_arrays(rooms)
+    if sys.byteorder == "big":
+        for values in (xs, ys, edges):
+            values.byteswap()
+    header = LAYOUT_HEADER.pack(
+        LAYOUT_MAGIC, LAYOUT_VERSION, iterations,
+        THEME_CHOICES.index(grammar.current_theme),
+        MAIN_TREASURES.index(grammar.story_state['main_treasure']),
+        seed, len(xs), len(edges) // 2
+    )
+    return header + xs.tobytes() + ys.tobytes() + bytes(types) + edges.tobytes()
+
+def decode_layout_binary(data: bytes) -> Dict:
+    """Inverse of encode_layout_binary, returning the same keys as layout_dict"""
+    magic, version, iterations, theme, treasure, seed, room_count, edge_count = LAYOUT_HEADER.unpack_from(data)
+    if magic != LAYOUT_MAGIC or version != LAYOUT_VERSION:
+        raise ValueError("Not a dungeon layout record")
+
+    offset = LAYOUT_HEADER.size
+    xs, ys, edges = array('H'), array('H'), array('I')
+    xs.frombytes(data[offset:offset + 2 * room_count])
+    offset += 2 * room_count
+    ys.frombytes(data[offset:offset + 2 * room_count])
+    offset += 2 * room_count
+    types = data[offset:offset + room_count]
+    offset += room_count
+    edges.frombytes(data[offset:offset + 8 * edge_count])
+    if sys.byteorder == "big":
+        for values in (xs, ys, edges):
+            values.byteswap()
+
+    return {
+        "format": "layout",
+        "seed": seed,
+        "iterations": iterations,
+        "typeNames": list(ROOM_TYPES),
+        "x": xs.tolist(),
+        "y": ys.tolist(),
+        "types": list(types),
+        "edges": edges.tolist(),
+        "theme": THEME_CHOICES[theme].value,
+        "mainTreasure": MAIN_TREASURES[treasure]
+    }
@@ -0,0 +1,43 @@
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any
+
+LOGGER_NAME = "dungeon"
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, event and the record's fields"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created)) + "Z",
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["traceback"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def configure_logging(level: str = None) -> logging.Logger:
+    """Attach a JSON stderr handler; level from DUNGEON_LOG_LEVEL (default WARNING)"""
+    logger = logging.getLogger(LOGGER_NAME)
+    level = (level or os.environ.get("DUNGEON_LOG_LEVEL", "WARNING")).upper()
+    logger.setLevel(getattr(logging, level, logging.WARNING))
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.propagate = False
+    return logger
+
+def get_logger(name: str = "") -> logging.Logger:
+    return logging.getLogger(f"{LOGGER_NAME}.{name}" if name else LOGGER_NAME)
+
+def log_event(logger: logging.Logger, level: int, event: str, exc_info: bool = False, **fields: Any) -> None:
+    """Log an event with structured fields; nothing is built when the level is disabled"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, exc_info=exc_info, extra={"fields": fields})
@@ -1,7 +1,10 @@
 import random
 import math
 from dataclasses import dataclass
-from typing import List, Dict, Tuple
+from typing import List, Dict, Tuple, Optional, Iterable, Iterator, Sequence, Mapping
+from .dungeon_grid import DungeonGrid, DistanceIndex, graph_distances
+from .dungeon_metrics import stage
+from .dungeon_placement import DEFAULT_SPECIAL_RULES, place_specials
 
 @dataclass
 class Room:
@@ -14,20 +17,53 @@ class Room:
         if self.connections is None:
             self.connections = []
 
+# Opcodes for the compiled interpreter; other rule symbols get codes above these
+OP_FORWARD, OP_RIGHT, OP_LEFT, OP_PUSH, OP_POP = range(5)
+TURTLE_OPCODES = {'F': OP_FORWARD, '+': OP_RIGHT, '-': OP_LEFT, '[': OP_PUSH, ']': OP_POP}
+
+# (dx, dy) for each of the four headings: 0, 90, 180 and 270 degrees
+DIRECTION_VECTORS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+# Compiled programs keyed by rule set, shared by every generator instance
+_compiled_rules = {}
+
+# Expected-expansion tables keyed by compiled program, see _expansion_stats
+_expansion_stats = {}
+
+# Size-targeted generation grows the layout in rounds of at most this depth;
+# deeper rounds mostly revisit cells the round already filled
+TARGET_MAX_DEPTH = 4
+
+# Hard cap on forward steps per requested room, so the cost stays linear in the target
+TARGET_STEP_BUDGET = 64
+
+def rules_key(rules: Mapping[str, Sequence[str]]) -> Tuple:
+    """Hashable form of a rule set, the key of _compiled_rules"""
+    return tuple((symbol, tuple(productions)) for symbol, productions in rules.items())
+
 class DungeonLSystem:
-    def __init__(self):
+    def __init__(self, rng: Optional[random.Random] = None):
+        # Per-instance random source so a seed reproduces the same layout
+        self.rng = rng if rng is not None else random.Random()
+
         # L-System rules for dungeon generation
         self.rules = {
             'S': ['F[+F]F[-F]F'],  # Start rule - creates a basic branch
             'F': ['F', 'F[+F]', 'F[-F]', 'F[+F][-F]']  # Room placement rules
         }
+
+        # Special room rules (see dungeon_placement.SpecialRule), applied in order
+        self.special_rules = DEFAULT_SPECIAL_RULES
+        self.placed = {}  # Room type -> how many the last generate() placed
         
         # Parameters for generation
         self.angle = 90  # Angle for turns (in degrees)
         self.step_size = 1
         self.current_pos = (0, 0)
         self.current_angle = 0
-        self.rooms = {}  # Dictionary to store room positions
+        self.grid = None  # Dense layout, used whenever rooms land on adjacent cells
+        self.rooms = {}  # Position -> room; a view over self.grid when it is in use
+        self.distances = {}  # Position -> corridor distance from the entrance
         
     def _apply_rules(self, sequence: str, iterations: int) -> str:
         """Apply L-System rules for given number of iterations"""
@@ -35,12 +71,178 @@ class DungeonLSystem:
             new_sequence = ""
             for char in sequence:
                 if char in self.rules:
-                    new_sequence += random.choice(self.rules[char])
+                    new_sequence += self.rng.choice(self.rules[char])
                 else:
                     new_sequence += char
             sequence = new_sequence
         return sequence
     
+    def _expand_stream(self, axiom: Sequence, iterations: int, rules: Dict = None) -> Iterator:
+        """Expand the axiom depth-first, yielding final symbols one at a time.
+
+        Only the productions on the current derivation path are held, so memory
+        depends on `iterations` instead of the length of the full sequence.
+        Works on rule strings or on compiled opcode tuples.
+        """
+        rules = self.rules if rules is None else rules
+        stack = [(iter(axiom), iterations)]
+        while stack:
+            symbols, depth = stack[-1]
+            char = next(symbols, None)
+            if char is None:
+                stack.pop()
+            elif depth > 0 and char in rules:
+                stack.append((iter(self.rng.choice(rules[char])), depth - 1))
+            else:
+                yield char
+
+    def _compile_rules(self) -> Tuple[Dict[int, Tuple[Tuple[int, ...], ...]], Dict[str, int]]:
+        """Tokenize every rule string into a tuple of integer opcodes"""
+        key = rules_key(self.rules)
+        compiled = _compiled_rules.get(key)
+        if compiled is not None:
+            return compiled
+
+        codes = dict(TURTLE_OPCODES)
+        for symbol, productions in key:
+            for char in symbol + ''.join(productions):
+                codes.setdefault(char, len(codes))
+
+        program = {
+            codes[symbol]: tuple(tuple(codes[char] for char in production) for production in productions)
+            for symbol, productions in key
+        }
+        _compiled_rules[key] = (program, codes)
+        return program, codes
+
+    def _apply_compiled(self, program: Dict, axiom: Sequence[int], iterations: int) -> List[int]:
+        """Same breadth-first rewriting as _apply_rules, on opcode lists"""
+        sequence = list(axiom)
+        for _ in range(iterations):
+            new_sequence = []
+            for op in sequence:
+                if op in program:
+                    new_sequence.extend(self.rng.choice(program[op]))
+                else:
+                    new_sequence.append(op)
+            sequence = new_sequence
+        return sequence
+
+    def opcodes(self, iterations: int, streaming: bool = True, axiom: str = 'S') -> Iterable[int]:
+        """Expanded derivation as compiled opcodes (OP_FORWARD, OP_RIGHT, ...)"""
+        program, codes = self._compile_rules()
+        start = tuple(codes[char] for char in axiom)
+        if streaming:
+            return self._expand_stream(start, iterations, program)
+        return self._apply_compiled(program, start, iterations)
+
+    def _expansion_stats(self, program: Dict, depth: int) -> Tuple[Dict[int, List[float]], Dict[int, List[Tuple[float, ...]]]]:
+        """Expected forward steps per symbol and per production, by remaining depth.
+
+        Assumes uniform production choice. Returns (symbol_yield, production_yield)
+        where symbol_yield[code][d] is the expected number of OP_FORWARD from
+        expanding `code` d more times, and production_yield[code][d][i] the same
+        for its i-th production expanded d more times.
+        """
+        key = (id(program), depth)
+        stats = _expansion_stats.get(key)
+        if stats is not None:
+            return stats
+
+        symbols = set(program) | {op for productions in program.values()
+                                  for production in productions for op in production}
+        symbol_yield = {op: [1.0 if op == OP_FORWARD else 0.0] for op in symbols}
+        production_yield = {op: [] for op in program}
+        for d in range(depth):
+            for op, productions in program.items():
+                production_yield[op].append(tuple(
+                    sum(symbol_yield[char][d] for char in production) for production in productions))
+            for op in symbols:
+                if op in program:
+                    options = production_yield[op][d]
+                    symbol_yield[op].append(sum(options) / len(options))
+                else:
+                    symbol_yield[op].append(symbol_yield[op][0])
+        stats = _expansion_stats[key] = (symbol_yield, production_yield)
+        return stats
+
+    def _expand_targeted(self, target: int, tolerance: int, axiom: str = 'S') -> Iterator[int]:
+        """Opcodes that grow the grid to about `target` rooms, steering each choice.
+
+        The axiom is expanded depth-first in rounds, each continuing from where
+        the last one ended after a random turn. A round's depth comes from the
+        expected-expansion table. Inside a round every production is drawn at
+        random among those whose expected new rooms still fit what is missing,
+        counting the expansions already pending. New rooms per forward step is
+        measured live from the grid, since branches often revisit cells.
+
+        Rounds continue until the grid has `target` rooms; expansion then stops
+        at the end of the round or at `target + tolerance` rooms, whichever
+        comes first. Forward steps are capped at TARGET_STEP_BUDGET per room.
+        """
+        program, codes = self._compile_rules()
+        symbol_yield, production_yield = self._expansion_stats(program, TARGET_MAX_DEPTH)
+        grid, rng = self.grid, self.rng
+        start = tuple(codes[char] for char in axiom)
+        high = target + tolerance
+        budget = TARGET_STEP_BUDGET * target
+        steps = 0
+
+        first_round = True
+        while len(grid) < target and steps < budget:
+            if not first_round:
+                turn = rng.choice((None, OP_RIGHT, OP_LEFT))
+                if turn is not None:
+                    yield turn
+            first_round = False
+
+            # new rooms per forward step so far, starting from an optimistic 1
+            efficiency = min(1.0, (len(grid) + 1) / (steps + 2))
+            missing = target - len(grid)
+            depth = next((d for d in range(1, TARGET_MAX_DEPTH + 1)
+                          if efficiency * sum(symbol_yield[op][d] for op in start) >= missing),
+                         TARGET_MAX_DEPTH)
+
+            pending = sum(symbol_yield[op][depth] for op in start)
+            stack = [[start, 0, depth]]
+            while stack:
+                frame = stack[-1]
+                symbols, i, d = frame
+                if i == len(symbols):
+                    stack.pop()
+                    continue
+                frame[1] = i + 1
+                op = symbols[i]
+
+                if d > 0 and op in program:
+                    pending -= symbol_yield[op][d]
+                    productions = program[op]
+                    options = production_yield[op][d - 1]
+                    if len(productions) == 1:
+                        choice = 0
+                    else:
+                        efficiency = min(1.0, (len(grid) + 1) / (steps + 2))
+                        room_left = target - len(grid) - efficiency * pending
+                        fitting = [j for j, expected in enumerate(options) if efficiency * expected <= room_left]
+                        if fitting:
+                            choice = rng.choice(fitting)
+                        else:
+                            choice = min(range(len(options)), key=options.__getitem__)
+                    pending += options[choice]
+                    stack.append([productions[choice], 0, d - 1])
+                    continue
+
+                pending -= symbol_yield[op][0]
+                if op == OP_FORWARD:
+                    steps += 1
+                yield op
+                if len(grid) >= high or steps >= budget:
+                    return
+
+    def _fits_grid(self) -> bool:
+        """Right-angle turns and unit steps keep every room on a neighbouring cell"""
+        return self.angle % 90 == 0 and self.step_size == 1
+
     def _calculate_new_position(self) -> Tuple[int, int]:
         """Calculate new position based on current angle and step size"""
         angle_rad = math.radians(self.current_angle)
@@ -48,14 +250,18 @@ class DungeonLSystem:
         new_y = self.current_pos[1] + self.step_size * math.sin(angle_rad)
         return (round(new_x), round(new_y))
     
-    def _interpret_sequence(self, sequence: str) -> Dict[Tuple[int, int], Room]:
+    def _interpret_sequence(self, sequence: Iterable[str]) -> Mapping[Tuple[int, int], Room]:
         """Interpret L-System sequence to create rooms"""
         stack = []  # Stack for branching
+        grid = self.grid
         
         for char in sequence:
             if char == 'F':  # Move forward and create room
                 new_pos = self._calculate_new_position()
-                if new_pos not in self.rooms:
+                if grid is not None:
+                    if grid.add_room(new_pos[0], new_pos[1]):
+                        grid.connect(self.current_pos[0], self.current_pos[1], new_pos[0], new_pos[1])
+                elif new_pos not in self.rooms:
                     self.rooms[new_pos] = Room(new_pos[0], new_pos[1])
                     # Connect with previous room
                     if self.current_pos != new_pos:
@@ -74,41 +280,111 @@ class DungeonLSystem:
         
         return self.rooms
     
-    def generate(self, iterations: int = 3) -> Dict[Tuple[int, int], Room]:
-        """Generate dungeon layout using L-System"""
-        self.rooms = {}
+    def _interpret_compiled(self, ops: Iterable[int]) -> Mapping[Tuple[int, int], Room]:
+        """Interpret opcodes into the grid using integer headings instead of trigonometry"""
+        grid = self.grid
+        turn = (self.angle // 90) % 4
+        heading = (self.current_angle // 90) % 4
+        x, y = self.current_pos
+        stack = []  # flat x, y, heading triples
+
+        for op in ops:
+            if op == OP_FORWARD:
+                dx, dy = DIRECTION_VECTORS[heading]
+                if grid.add_room(x + dx, y + dy):
+                    # Connect with previous room
+                    grid.connect(x, y, x + dx, y + dy)
+                x += dx
+                y += dy
+            elif op == OP_RIGHT:
+                heading = (heading + turn) & 3
+            elif op == OP_LEFT:
+                heading = (heading - turn) & 3
+            elif op == OP_PUSH:
+                stack.append(x)
+                stack.append(y)
+                stack.append(heading)
+            elif op == OP_POP:
+                heading = stack.pop()
+                y = stack.pop()
+                x = stack.pop()
+
+        self.current_pos = (x, y)
+        self.current_angle = heading * 90
+        return self.rooms
+
+    def generate(self, iterations: int = 3, streaming: bool = False, compiled: bool = True,
+                 target_rooms: Optional[int] = None, tolerance: Optional[int] = None) -> Mapping[Tuple[int, int], Room]:
+        """Generate dungeon layout using L-System
+
+        With `streaming` the sequence is expanded lazily and fed straight to the
+        interpreter. Random choices are then drawn depth-first, so a seed gives a
+        different (but still reproducible) layout than the default mode.
+
+        `compiled` runs the opcode interpreter, which gives the same layout as the
+        string interpreter for the same seed.
+
+        Right-angle unit-step layouts are stored in a DungeonGrid and returned as
+        a read-only Room-compatible view. Any other geometry falls back to the
+        string interpreter and a dict of Room objects.
+
+        With `target_rooms` the layout is grown to that many rooms, give or take
+        `tolerance` (default 5%), by _expand_targeted; `iterations` and
+        `streaming` are then ignored. This needs the grid layout.
+        """
+        if target_rooms is not None:
+            if not self._fits_grid():
+                raise ValueError("target_rooms needs right-angle turns and unit steps")
+            if tolerance is None:
+                tolerance = target_rooms // 20
+
         self.current_pos = (0, 0)
         self.current_angle = 0
         
         # Create entrance room
-        self.rooms[self.current_pos] = Room(0, 0, type="entrance")
+        if self._fits_grid():
+            self.grid = DungeonGrid()
+            self.grid.add_room(0, 0, "entrance")
+            self.rooms = self.grid.rooms()
+        else:
+            self.grid = None
+            self.rooms = {self.current_pos: Room(0, 0, type="entrance")}
         
         # Generate and interpret sequence
-        sequence = self._apply_rules('S', iterations)
-        rooms = self._interpret_sequence(sequence)
+        # (streaming expansion runs inside the interpreter, so it is timed there)
+        if target_rooms is not None:
+            with stage("interpret"):
+                rooms = self._interpret_compiled(self._expand_targeted(target_rooms, tolerance))
+        elif compiled and self.grid is not None:
+            with stage("expand"):
+                ops = self.opcodes(iterations, streaming)
+            with stage("interpret"):
+                rooms = self._interpret_compiled(ops)
+        else:
+            with stage("expand"):
+                if streaming:
+                    sequence = self._expand_stream('S', iterations)
+                else:
+                    sequence = self._apply_rules('S', iterations)
+            with stage("interpret"):
+                rooms = self._interpret_sequence(sequence)
         
-        # Set last generated room as exit
-        last_pos = max(rooms.keys(), key=lambda x: x[0] + x[1])
+        # One BFS from the entrance; the graph-farthest room becomes the exit
+        with stage("distances"):
+            if self.grid is not None:
+                self.distances = DistanceIndex(self.grid, (0, 0))
+                last_pos = self.distances.farthest()
+            else:
+                self.distances = graph_distances(rooms, (0, 0))
+                last_pos = max(rooms.keys(), key=lambda pos: self.distances.get(pos, -1))
         rooms[last_pos].type = "exit"
         
         # Add some treasure and monster rooms
-        self._add_special_rooms()
+        with stage("place_specials"):
+            self._add_special_rooms()
         
         return self.rooms
     
     def _add_special_rooms(self):
-        """Add treasure and monster rooms to the dungeon"""
-        normal_rooms = [pos for pos, room in self.rooms.items() 
-                       if room.type == "normal"]
-        
-        # Add treasure rooms (10% of normal rooms)
-        treasure_count = max(1, len(normal_rooms) // 10)
-        for pos in random.sample(normal_rooms, treasure_count):
-            self.rooms[pos].type = "treasure"
-            
-        # Add monster rooms (20% of normal rooms)
-        normal_rooms = [pos for pos, room in self.rooms.items() 
-                       if room.type == "normal"]
-        monster_count = max(1, len(normal_rooms) // 5)
-        for pos in random.sample(normal_rooms, monster_count):
-            self.rooms[pos].type = "monster"
\ No newline at end of file
+        """Add treasure and monster rooms to the dungeon, following self.special_rules"""
+        self.placed = place_specials(self.rooms, self.distances, self.rng, self.special_rules)
\ No newline at end of file
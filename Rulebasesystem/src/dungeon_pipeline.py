@@ -0,0 +1,179 @@
+import gzip
+import importlib.util
+import json
+import random
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+from .dungeon_lsystem import DungeonLSystem
+from .dungeon_visualizer import DungeonVisualizer
+from .dungeon_grammar import DungeonGrammar
+from .dungeon_grid import DistanceIndex, graph_distances
+from .dungeon_layout import layout_dict, encode_layout_binary
+from .dungeon_session import DungeonSession
+from .dungeon_metrics import stage, observe
+
+# optional, enables Content-Encoding: br; only looked up here and imported on first use
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+# bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+# bump whenever the same seed would produce different output (invalidates ETags)
+GENERATOR_VERSION = "1"
+
+# deeper derivations are expanded lazily instead of building the full string
+STREAMING_MIN_ITERATIONS = 6
+
+def new_seed() -> int:
+    """Pick a fresh seed for requests that did not ask for one"""
+    return random.getrandbits(32)
+
+def generate_layout(seed: int, iterations: int = 3, target_rooms: Optional[int] = None, tolerance: Optional[int] = None) -> Tuple[DungeonGrammar, DungeonLSystem]:
+    """Build the grammar and layout for a seed, exactly as generate_payload does"""
+    # one random source shared by every stage of this request
+    rng = random.Random(seed)
+
+    # initial grammar
+    grammar = DungeonGrammar(rng=rng)
+
+    # generate maps using Lsystem
+    generator = DungeonLSystem(rng=rng)
+    generator.generate(iterations=iterations, streaming=iterations >= STREAMING_MIN_ITERATIONS,
+                       target_rooms=target_rooms, tolerance=tolerance)
+    observe("rooms", len(generator.rooms))
+    return grammar, generator
+
+def generate_distances(seed: int, iterations: int = 3, target_rooms: Optional[int] = None,
+                       tolerance: Optional[int] = None) -> DistanceIndex:
+    """Corridor distances of a seeded layout, in the normalized coordinates of the description keys"""
+    _, generator = generate_layout(seed, iterations, target_rooms, tolerance)
+    return generator.distances.normalized()
+
+def _render_dungeon(seed: int, iterations: int, cell_size: int, compact: bool,
+                    target_rooms: Optional[int] = None, tolerance: Optional[int] = None,
+                    visualizer: Optional[DungeonVisualizer] = None) -> Tuple[Dict, DungeonGrammar, Mapping, Optional[Mapping]]:
+    """Everything except room descriptions: payload, grammar, normalized rooms and distances"""
+    grammar, generator = generate_layout(seed, iterations, target_rooms, tolerance)
+    dungeon = generator.rooms
+
+    # retrive overview description
+    with stage("overview"):
+        overview = grammar.generate_dungeon_overview()
+
+    # get image and normalize location
+    if visualizer is None:
+        visualizer = DungeonVisualizer(cell_size=cell_size)
+    with stage("render_svg"):
+        svg_content, normalized_rooms = visualizer.render_svg(dungeon, compact=compact, return_normalized=True)
+    observe("svg_bytes", len(svg_content))
+
+    # corridor distances from the generator's BFS, in normalized coordinates
+    distances = generator.distances.normalized() if generator.grid is not None else None
+
+    payload = {
+        "svg": svg_content,
+        "overview": overview,
+        "theme": grammar.current_theme.value,
+        "mainTreasure": grammar.story_state['main_treasure'],
+        "seed": seed,
+        "iterations": iterations,
+        "cellSize": cell_size
+    }
+    if target_rooms is not None:
+        payload["targetRooms"] = target_rooms
+        payload["roomCount"] = len(dungeon)
+    return payload, grammar, normalized_rooms, distances
+
+def generate_payload(seed: int, iterations: int = 3, cell_size: int = 50, compact: bool = False,
+                     target_rooms: Optional[int] = None, tolerance: Optional[int] = None,
+                     visualizer: Optional[DungeonVisualizer] = None) -> Dict:
+    """Generate the full dungeon payload; the same arguments always give the same result"""
+    payload, grammar, normalized_rooms, distances = _render_dungeon(
+        seed, iterations, cell_size, compact, target_rooms, tolerance, visualizer)
+
+    # get normalized location
+    entrance_pos = next((pos for pos, room in normalized_rooms.items() if room.type == 'entrance'), (0, 0))
+
+    # description attached on normalized location
+    with stage("describe"):
+        payload["descriptions"] = {
+            f"{pos[0]},{pos[1]}": description
+            for pos, description in grammar.describe_rooms(normalized_rooms, entrance_pos, distances).items()
+        }
+    return payload
+
+def generate_session(seed: int, iterations: int = 3, cell_size: int = 50,
+                     compact: bool = False, target_rooms: Optional[int] = None, tolerance: Optional[int] = None) -> Tuple[Dict, DungeonSession]:
+    """Layout, SVG and overview now; each room is described when it is first opened"""
+    payload, grammar, normalized_rooms, distances = _render_dungeon(
+        seed, iterations, cell_size, compact, target_rooms, tolerance)
+    if distances is None:
+        entrance_pos = next((pos for pos, room in normalized_rooms.items() if room.type == 'entrance'), (0, 0))
+        distances = graph_distances(normalized_rooms, entrance_pos)
+    session = DungeonSession(grammar, normalized_rooms, distances, seed, iterations, cell_size, compact)
+    payload["dungeonId"] = session.id
+    return payload, session
+
+def encode_payload(payload: Dict) -> bytes:
+    """Serialize a payload once so cached copies can be sent as-is"""
+    with stage("encode"):
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def generate_body(seed: int, iterations: int = 3, cell_size: int = 50, compact: bool = False,
+                  target_rooms: Optional[int] = None, tolerance: Optional[int] = None) -> bytes:
+    """Generate and serialize in one call, so worker processes only send bytes back"""
+    return encode_payload(generate_payload(seed, iterations, cell_size, compact, target_rooms, tolerance))
+
+def generate_ndjson(seeds: Sequence[int], iterations: int = 3, cell_size: int = 50, compact: bool = False,
+                    target_rooms: Optional[int] = None, tolerance: Optional[int] = None) -> bytes:
+    """Several payloads as NDJSON lines from one worker call, sharing one visualizer"""
+    visualizer = DungeonVisualizer(cell_size=cell_size)
+    return b"".join(
+        encode_payload(generate_payload(seed, iterations, cell_size, compact, target_rooms, tolerance, visualizer)) + b"\n"
+        for seed in seeds
+    )
+
+def generate_layout_body(seed: int, iterations: int = 3, binary: bool = False,
+                         target_rooms: Optional[int] = None, tolerance: Optional[int] = None) -> bytes:
+    """Layout-only response: arrays straight from the generator, no SVG or room text"""
+    grammar, generator = generate_layout(seed, iterations, target_rooms, tolerance)
+    rooms = generator.grid.normalized()
+    if binary:
+        with stage("encode"):
+            return encode_layout_binary(rooms, grammar, seed, iterations)
+    with stage("overview"):
+        overview = grammar.generate_dungeon_overview()
+    return encode_payload(layout_dict(rooms, grammar, seed, iterations, overview))
+
+def negotiate_encoding(accept_encoding: str) -> str:
+    """Pick br, gzip or identity from an Accept-Encoding header"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(name.strip())
+    if BROTLI_AVAILABLE and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return "identity"
+
+def compress_body(body: bytes, encoding: str) -> Tuple[bytes, str]:
+    """Compress with the negotiated encoding; returns the body and the encoding used"""
+    if len(body) < MIN_COMPRESS_SIZE or encoding == "identity":
+        return body, "identity"
+    if encoding == "br":
+        import brotli
+        return brotli.compress(body, quality=5), "br"
+    return gzip.compress(body, compresslevel=6, mtime=0), "gzip"
+
+def build_response_body(fmt: str, seed: int, iterations: int, cell_size: int, compact: bool,
+                        binary: bool, encoding: str, target_rooms: Optional[int] = None,
+                        tolerance: Optional[int] = None) -> Tuple[bytes, str]:
+    """Generate, serialize and compress in one worker call"""
+    if fmt == "layout":
+        body = generate_layout_body(seed, iterations, binary, target_rooms, tolerance)
+    else:
+        body = generate_body(seed, iterations, cell_size, compact, target_rooms, tolerance)
+    with stage("compress"):
+        return compress_body(body, encoding)
@@ -0,0 +1,156 @@
+import heapq
+import math
+import random
+from array import array
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence
+
+from .dungeon_grid import DistanceIndex, TYPE_CODES
+
+NORMAL = TYPE_CODES['normal']
+
+# Set bits per 4-bit adjacency mask, i.e. corridors per room
+_DEGREE = bytes(bin(mask).count("1") for mask in range(16))
+
+@dataclass(frozen=True)
+class SpecialRule:
+    """How many rooms of one type to place, and which rooms qualify.
+
+    One room in every `one_in` rooms still normal when the rule runs becomes
+    `type` (at least `min_count`). Candidates must lie between `min_depth` and
+    `max_depth` corridors from the entrance. Each is weighted by
+    `dead_end_weight` if it has a single corridor, times
+    1 + `depth_weight` * depth. With `not_adjacent`, no two of the placed rooms
+    share a corridor.
+
+    When fewer rooms qualify than asked for, all of them are used; placement
+    never retries.
+    """
+    type: str
+    one_in: int
+    min_count: int = 1
+    min_depth: int = 0
+    max_depth: Optional[int] = None
+    dead_end_weight: float = 1.0
+    depth_weight: float = 0.0
+    not_adjacent: bool = False
+
+    @property
+    def uniform(self) -> bool:
+        """True when every normal room is an equally likely candidate"""
+        return (self.min_depth <= 0 and self.max_depth is None and self.dead_end_weight == 1.0
+                and self.depth_weight == 0.0 and not self.not_adjacent)
+
+# 10% treasure, then 20% of the remaining normal rooms as monsters
+DEFAULT_SPECIAL_RULES = (SpecialRule("treasure", 10), SpecialRule("monster", 5))
+
+class RoomIndex:
+    """Per-room columns (type code, depth, degree) built in one pass over a layout.
+
+    Rooms keep the layout's iteration order, so index i is the i-th room.
+    Types are changed here and written back to the layout as they are set.
+    """
+
+    def __init__(self, rooms: Mapping, distances: Mapping):
+        self.rooms = rooms
+        self.grid = getattr(rooms, "grid", None)
+        if self.grid is not None:
+            self._index_grid(distances)
+        else:
+            self._index_rooms(distances)
+
+    def _index_grid(self, distances: Mapping) -> None:
+        grid = self.grid
+        min_x, min_y, width = grid.min_x, grid.min_y, grid.width
+        self.cells = array('i', [(y - min_y) * width + (x - min_x) for x, y in zip(grid.xs, grid.ys)])
+        types, masks = grid.types, grid.masks
+        self.codes = bytearray(types[cell] for cell in self.cells)
+        self.degree = bytearray(_DEGREE[masks[cell]] for cell in self.cells)
+        if isinstance(distances, DistanceIndex) and distances.grid is grid and not distances.stale:
+            dist = distances.dist
+            self.depth = array('i', [dist[cell] for cell in self.cells])
+        else:
+            self.depth = array('i', [distances.get(pos, -1) for pos in self.rooms])
+        # grid graphs are bipartite: connected rooms never share a depth
+        self.level = None
+
+    def _index_rooms(self, distances: Mapping) -> None:
+        self.positions = list(self.rooms)
+        rooms = [self.rooms[pos] for pos in self.positions]
+        self.codes = bytearray(TYPE_CODES[room.type] for room in rooms)
+        self.degree = bytearray(min(len(room.connections), 255) for room in rooms)
+        self.depth = array('i', [distances.get(pos, -1) for pos in self.positions])
+        # rooms linked to a room at the same depth (an odd cycle), unsafe for not_adjacent
+        self.level = bytearray(any(distances.get(other, -2) == distances.get(pos, -1)
+                                   for other in room.connections)
+                               for pos, room in zip(self.positions, rooms))
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def set_type(self, i: int, room_type: str) -> None:
+        code = TYPE_CODES[room_type]
+        self.codes[i] = code
+        if self.grid is not None:
+            self.grid.types[self.cells[i]] = code
+        else:
+            self.rooms[self.positions[i]].type = room_type
+
+def _choose_weighted(index: RoomIndex, candidates: Sequence[int], count: int, rule: SpecialRule,
+                     rng: random.Random) -> List[int]:
+    """Weighted sample without replacement in one pass (Efraimidis-Spirakis A-Res).
+
+    Each candidate gets the key log(u) / weight and the `count` largest keys
+    win, kept in a min-heap. With `not_adjacent` rooms at even and odd depths
+    fill separate reservoirs: in a tree, rooms one corridor apart are one
+    depth apart, so either reservoir is free of neighbours. The fuller one is
+    used.
+    """
+    depth, degree, level = index.depth, index.degree, index.level
+    reservoirs = ([], []) if rule.not_adjacent else ([],)
+    totals = [0.0, 0.0]
+    max_depth = rule.max_depth if rule.max_depth is not None else math.inf
+    for i in candidates:
+        d = depth[i]
+        if d < rule.min_depth or d > max_depth:
+            continue
+        if rule.not_adjacent and level is not None and level[i]:
+            continue
+        weight = (rule.dead_end_weight if degree[i] == 1 else 1.0) * (1.0 + rule.depth_weight * d)
+        if weight <= 0:
+            continue
+        key = math.log(1.0 - rng.random()) / weight
+        bucket = d & 1 if rule.not_adjacent else 0
+        totals[bucket] += weight
+        reservoir = reservoirs[bucket]
+        if len(reservoir) < count:
+            heapq.heappush(reservoir, (key, i))
+        elif key > reservoir[0][0]:
+            heapq.heapreplace(reservoir, (key, i))
+    best = max(range(len(reservoirs)), key=lambda b: (len(reservoirs[b]), totals[b]))
+    return [i for _, i in reservoirs[best]]
+
+def place_specials(rooms: Mapping, distances: Mapping, rng: random.Random,
+                   rules: Sequence[SpecialRule] = DEFAULT_SPECIAL_RULES) -> Dict[str, int]:
+    """Turn normal rooms into special rooms, rule by rule; returns how many each rule placed.
+
+    The layout is read once into a RoomIndex; each rule is then one pass over
+    the remaining normal rooms. Unconstrained rules draw with rng.sample, so
+    the default rules give the same rooms as sampling the normal rooms
+    directly. Constrained rules use weighted reservoir sampling.
+    """
+    index = RoomIndex(rooms, distances)
+    normal = [i for i, code in enumerate(index.codes) if code == NORMAL]
+    placed = {}
+    for rule in rules:
+        count = min(max(rule.min_count, len(normal) // rule.one_in), len(normal))
+        if rule.uniform:
+            chosen = [normal[j] for j in rng.sample(range(len(normal)), count)]
+        else:
+            chosen = _choose_weighted(index, normal, count, rule, rng)
+        for i in chosen:
+            index.set_type(i, rule.type)
+        placed[rule.type] = placed.get(rule.type, 0) + len(chosen)
+        if chosen:
+            normal = [i for i in normal if index.codes[i] == NORMAL]
+    return placed
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from .dungeon_log import get_logger, log_event
+
+logger = get_logger("pool")
+
+class WarmPool:
+    """Bounded queue of ready-made responses for requests that accept any dungeon.
+
+    Background producers call `produce` until the queue is full, then wait on
+    the queue; every pop frees a slot and the next producer call refills it.
+    """
+
+    def __init__(self, produce: Callable[[], Awaitable[bytes]], size: int = 8,
+                 refill_concurrency: int = 1, retry_delay: float = 0.5):
+        self.produce = produce
+        self.size = size
+        self.refill_concurrency = refill_concurrency
+        self.retry_delay = retry_delay
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.produced = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0
+
+    def start(self) -> None:
+        """Start the producers; must be called from the running event loop"""
+        if not self.enabled:
+            return
+        self._queue = asyncio.Queue(maxsize=self.size)
+        self._tasks = [asyncio.create_task(self._producer()) for _ in range(self.refill_concurrency)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _producer(self) -> None:
+        while True:
+            try:
+                body = await self.produce()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # busy or failing executor; back off and let requests go first
+                self.errors += 1
+                log_event(logger, logging.WARNING, "warm pool refill failed", error=str(e))
+                await asyncio.sleep(self.retry_delay)
+                continue
+            self.produced += 1
+            await self._queue.put(body)
+
+    def pop(self) -> Optional[bytes]:
+        """Take a ready response, or None when the pool is empty"""
+        if self._queue is None:
+            return None
+        try:
+            body = self._queue.get_nowait()
+        except asyncio.QueueEmpty:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return body
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": self.size,
+            "ready": self._queue.qsize() if self._queue is not None else 0,
+            "refillConcurrency": self.refill_concurrency,
+            "hits": self.hits,
+            "misses": self.misses,
+            "produced": self.produced,
+            "errors": self.errors
+        }
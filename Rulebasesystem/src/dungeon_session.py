@@ -0,0 +1,56 @@
+import secrets
+from typing import Dict, Mapping, Optional, Tuple
+
+from .dungeon_grammar import DungeonGrammar
+
+class DungeonSession:
+    """A generated dungeon kept server-side so rooms are described on first visit.
+
+    Descriptions come from the dungeon's own grammar and RNG, so the story
+    (villain, clues, revealed rooms) follows the order the player explores in.
+    """
+
+    def __init__(self, grammar: DungeonGrammar, rooms: Mapping, distances: Mapping,
+                 seed: int, iterations: int, cell_size: int, compact: bool = False):
+        self.id = secrets.token_urlsafe(12)
+        self.grammar = grammar
+        self.rooms = rooms
+        self.distances = distances
+        self.seed = seed
+        self.iterations = iterations
+        self.cell_size = cell_size
+        self.compact = compact  # the client's SVG uses <use> symbols, so partial updates must too
+        self.entrance_pos = next((pos for pos, room in rooms.items() if room.type == 'entrance'), (0, 0))
+        self.descriptions: Dict[Tuple[int, int], str] = {}
+        self.rerolls = 0
+        self.tiles = None  # LRUCache of rendered tiles, created by the first tile request
+
+    def describe_room(self, pos: Tuple[int, int]) -> Optional[str]:
+        """Description of a room, generated the first time it is asked for"""
+        if pos not in self.rooms:
+            return None
+        description = self.descriptions.get(pos)
+        if description is None:
+            description = self.grammar.generate_room_description(
+                self.rooms[pos].type, pos, self.entrance_pos, self.rooms, self.distances)
+            self.descriptions[pos] = description
+        return description
+
+    def story(self) -> Dict:
+        """Story progress so far, for the client to display"""
+        state = self.grammar.story_state
+        return {
+            "mainTreasure": state['main_treasure'],
+            "mainVillain": state['main_villain'],
+            "discoveredClues": list(state['discovered_clues']),
+            "treasureCount": state['treasure_count'],
+            "revealedRooms": len(state['revealed_rooms']),
+            "totalRooms": len(self.rooms)
+        }
+
+    def nbytes(self) -> int:
+        """Rough memory footprint, used to bound the session store"""
+        grid = getattr(self.rooms, "grid", None)
+        layout = 2 * len(grid.types) + 8 * len(grid.xs) if grid is not None else 300 * len(self.rooms)
+        tiles = self.tiles.total_bytes if self.tiles is not None else 0
+        return layout + tiles + sum(len(text) for text in self.descriptions.values())
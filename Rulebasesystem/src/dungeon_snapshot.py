@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, is_dataclass
+from enum import Enum
+from typing import Any, Dict, List, Mapping, Sequence
+
+from .dungeon_grammar import MAIN_TREASURES, NEIGHBOR_HINTS, ROOM_RULES, THEME_CHOICES, THEMES
+from .dungeon_lsystem import (DungeonLSystem, TARGET_MAX_DEPTH, TARGET_STEP_BUDGET, rules_key,
+                              _compiled_rules, _expansion_stats)
+from .dungeon_pipeline import GENERATOR_VERSION, generate_body, generate_layout_body
+from .dungeon_placement import DEFAULT_SPECIAL_RULES
+
+# The snapshot holds the compiled L-system program and its expected-expansion
+# table, a fingerprint of the grammar and rule tables they came from, and
+# digests of a few seeded dungeons. `snapshot.py build` writes it and
+# `snapshot.py check` rebuilds it from the source to validate it; the API
+# loads it at startup instead of compiling, and warm-up replays the seeded
+# dungeons to make sure this build still produces them.
+SNAPSHOT_FORMAT = 1
+SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules_snapshot.json")
+
+# (kind, arguments) of the seeded outputs pinned by the snapshot; together they
+# cover the plain, streaming and targeted expansions, layouts and chunks
+GOLDEN_CASES = (
+    ("payload", 1, 3, None),
+    ("payload", 2, 7, None),
+    ("payload", 3, 3, 500),
+    ("layout", 4, 5),
+    ("chunk", 5, 0, 0)
+)
+
+class SnapshotError(Exception):
+    """Raised when a snapshot is missing, unreadable or built from other tables"""
+
+def _plain(value: Any) -> Any:
+    """JSON form of the frozen tables: mappings, tuples, enums and dataclasses"""
+    if isinstance(value, Enum):
+        return value.value
+    if is_dataclass(value):
+        return _plain(asdict(value))
+    if isinstance(value, Mapping):
+        return {str(_plain(key)): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+def table_fingerprint() -> str:
+    """Digest of every grammar and rule table that shapes a seeded dungeon.
+
+    Key order is kept rather than sorted, since choices draw from the tables in order.
+    """
+    tables = {
+        "lsystem": DungeonLSystem().rules,
+        "targetMaxDepth": TARGET_MAX_DEPTH,
+        "targetStepBudget": TARGET_STEP_BUDGET,
+        "specialRules": DEFAULT_SPECIAL_RULES,
+        "themeChoices": THEME_CHOICES,
+        "mainTreasures": MAIN_TREASURES,
+        "themes": THEMES,
+        "roomRules": ROOM_RULES,
+        "neighborHints": NEIGHBOR_HINTS
+    }
+    return hashlib.sha1(json.dumps(_plain(tables)).encode()).hexdigest()
+
+def case_output(case: Sequence) -> bytes:
+    """Bytes produced for one GOLDEN_CASES entry"""
+    kind = case[0]
+    if kind == "payload":
+        _, seed, iterations, target_rooms = case
+        return generate_body(seed, iterations, 50, False, target_rooms)
+    if kind == "layout":
+        _, seed, iterations = case
+        return generate_layout_body(seed, iterations, True)
+    if kind == "chunk":
+        from .dungeon_chunks import generate_chunk
+        _, seed, cx, cy = case
+        return json.dumps(generate_chunk(seed, cx, cy).to_dict()).encode()
+    raise ValueError(f"Unknown snapshot case: {kind}")
+
+def build_snapshot() -> Dict:
+    """Compile the default rules and pin the seeded outputs, as JSON-ready data"""
+    generator = DungeonLSystem()
+    program, codes = generator._compile_rules()
+    symbol_yield, production_yield = generator._expansion_stats(program, TARGET_MAX_DEPTH)
+    snapshot = {
+        "format": SNAPSHOT_FORMAT,
+        "generatorVersion": GENERATOR_VERSION,
+        "fingerprint": table_fingerprint(),
+        "codes": codes,
+        "program": program,
+        "expansionStats": {"depth": TARGET_MAX_DEPTH, "symbolYield": symbol_yield,
+                           "productionYield": production_yield},
+        "golden": [{"case": list(case), "sha1": hashlib.sha1(case_output(case)).hexdigest()}
+                   for case in GOLDEN_CASES]
+    }
+    # round-trip so built and loaded snapshots compare equal (string keys, lists)
+    return json.loads(json.dumps(snapshot))
+
+def write_snapshot(path: str = SNAPSHOT_PATH) -> Dict:
+    snapshot = build_snapshot()
+    with open(path, "w") as f:
+        json.dump(snapshot, f, indent=1)
+        f.write("\n")
+    return snapshot
+
+def _read(path: str) -> Dict:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"Cannot read {path}: {e}")
+
+def load_snapshot(path: str = SNAPSHOT_PATH) -> Dict:
+    """Read a snapshot, refusing one built for another generator version or other tables"""
+    snapshot = _read(path)
+    if snapshot.get("format") != SNAPSHOT_FORMAT:
+        raise SnapshotError(f"{path} has format {snapshot.get('format')}, expected {SNAPSHOT_FORMAT}")
+    if snapshot.get("generatorVersion") != GENERATOR_VERSION:
+        raise SnapshotError(f"{path} was built for generator version {snapshot.get('generatorVersion')}")
+    if snapshot.get("fingerprint") != table_fingerprint():
+        raise SnapshotError(f"{path} was built from other grammar or rule tables")
+    return snapshot
+
+def install_snapshot(snapshot: Dict) -> bool:
+    """Seed the generator's compiled-rule caches; False if the rules were already compiled here"""
+    key = rules_key(DungeonLSystem().rules)
+    if key in _compiled_rules:
+        return False
+    program = {int(op): tuple(tuple(production) for production in productions)
+               for op, productions in snapshot["program"].items()}
+    _compiled_rules[key] = (program, dict(snapshot["codes"]))
+    stats = snapshot["expansionStats"]
+    _expansion_stats[(id(program), stats["depth"])] = (
+        {int(op): list(values) for op, values in stats["symbolYield"].items()},
+        {int(op): [tuple(row) for row in rows] for op, rows in stats["productionYield"].items()}
+    )
+    return True
+
+def check_snapshot(path: str = SNAPSHOT_PATH) -> List[str]:
+    """Rebuild the snapshot from the source and list every way the saved one differs"""
+    saved = _read(path)
+    fresh = build_snapshot()
+    problems = [f"{name} differs from the source" for name in
+                ("format", "generatorVersion", "fingerprint", "codes", "program", "expansionStats")
+                if saved.get(name) != fresh[name]]
+    saved_golden = {json.dumps(entry["case"]): entry["sha1"] for entry in saved.get("golden", [])}
+    for entry in fresh["golden"]:
+        digest = saved_golden.get(json.dumps(entry["case"]))
+        if digest is not None and digest != entry["sha1"]:
+            if saved.get("generatorVersion") == GENERATOR_VERSION:
+                problems.append(f"seeded output of {entry['case']} changed without a GENERATOR_VERSION bump")
+            else:
+                problems.append(f"seeded output of {entry['case']} differs")
+        elif digest is None:
+            problems.append(f"{entry['case']} is missing")
+    return problems
@@ -0,0 +1,142 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    encoding TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('total_bytes', 0);
+"""
+
+class SQLiteStore:
+    """Size-bounded store of (body, encoding) responses in one SQLite file.
+
+    Every worker process opens the same file, so a dungeon generated by one
+    worker is served from the store by all the others. Eviction is
+    approximately least recently used: a hit refreshes an entry's access time
+    at most once per `touch_interval` seconds, which keeps reads from turning
+    into writes that every worker has to queue behind.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 1024 * 1024,
+                 touch_interval: float = 60.0, busy_timeout: float = 2.0):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.touch_interval = touch_interval
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+
+        # Counters (this process only)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per thread; sqlite3 connections are not shared between threads"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        try:
+            conn = self._connection()
+            row = conn.execute("SELECT body, encoding, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            now = time.time()
+            if now - row[2] > self.touch_interval:
+                conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.Error:
+            # a locked or broken store only costs a regeneration
+            self.errors += 1
+            return None
+        self.hits += 1
+        return bytes(row[0]), row[1]
+
+    def put(self, key: str, entry: Tuple[bytes, str]) -> None:
+        body, encoding = entry
+        size = len(body)
+        if size > self.max_bytes:
+            return
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                             (key, body, encoding, size, time.time()))
+                conn.execute("UPDATE meta SET value = value + ? WHERE name = 'total_bytes'",
+                             (size - (old[0] if old else 0),))
+                total = conn.execute("SELECT value FROM meta WHERE name = 'total_bytes'").fetchone()[0]
+                if total > self.max_bytes:
+                    self._evict(conn, total)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error:
+            self.errors += 1
+
+    def _evict(self, conn: sqlite3.Connection, total: int) -> None:
+        """Drop least recently used entries until the store is 90% full"""
+        target = self.max_bytes * 9 // 10
+        freed = 0
+        while total - freed > target:
+            rows = conn.execute("SELECT key, size FROM entries ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                freed += size
+                self.evictions += 1
+                if total - freed <= target:
+                    break
+        conn.execute("UPDATE meta SET value = value - ? WHERE name = 'total_bytes'", (freed,))
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    @property
+    def total_bytes(self) -> int:
+        return self._connection().execute("SELECT value FROM meta WHERE name = 'total_bytes'").fetchone()[0]
+
+    def stats(self) -> Dict:
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": len(self),
+            "bytes": self.total_bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors
+        }
+
+def open_store(url: str, max_bytes: int) -> Optional[SQLiteStore]:
+    """Store named by DUNGEON_SHARED_STORE, e.g. 'sqlite:///var/cache/dungeons.db'; '' for none"""
+    if not url:
+        return None
+    scheme, _, location = url.partition("://")
+    if scheme == "sqlite" and location:
+        return SQLiteStore(location, max_bytes=max_bytes)
+    raise ValueError(f"Unsupported shared store: {url}")
@@ -0,0 +1,195 @@
+import io
+import struct
+import zlib
+from typing import Dict, List, Mapping, Tuple
+
+from .dungeon_grid import GridRooms, ROOM_TYPES
+from .dungeon_visualizer import DungeonVisualizer
+
+# Tiles are square windows onto a dungeon's cells. At MAX_ZOOM a tile spans
+# TILE_CELLS rooms per side; every zoom level below doubles the span. Tile
+# (z, x, y) covers cells x * span to (x + 1) * span - 1 (same for y), in the
+# coordinates of the room keys, so tiles never move when the dungeon grows.
+TILE_CELLS = 16
+MAX_ZOOM = 8
+TILE_PIXELS = 256
+
+# Level of detail by pixels per cell: full room markup, plain glyphs, then raster
+DETAIL_MIN_PIXELS = 16
+GLYPH_MIN_PIXELS = 4
+
+# Raster palette in drawing priority: a pixel covering several rooms shows the highest
+RASTER_ORDER = ('background', 'connection', 'normal', 'monster', 'treasure', 'entrance', 'exit')
+RASTER_INDEX = {name: index for index, name in enumerate(RASTER_ORDER)}
+BACKGROUND_COLOR = '#424242'
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+def tile_span(z: int) -> int:
+    """Cells per tile side at zoom `z`"""
+    return TILE_CELLS << (MAX_ZOOM - z)
+
+def tile_lod(z: int) -> str:
+    """'detail', 'glyph' or 'raster', from the pixels each cell gets at zoom `z`"""
+    pixels = TILE_PIXELS / tile_span(z)
+    if pixels >= DETAIL_MIN_PIXELS:
+        return "detail"
+    if pixels >= GLYPH_MIN_PIXELS:
+        return "glyph"
+    return "raster"
+
+def tile_rooms(rooms: Mapping, x0: int, y0: int, span: int) -> List[Tuple[int, int, str, List[Tuple[int, int]]]]:
+    """(x, y, type, connections to draw) for the rooms inside a tile.
+
+    Connections between two rooms of the tile are listed once; connections
+    leaving the tile are listed too, so the line reaches the tile edge.
+    """
+    found = []
+    x1, y1 = x0 + span, y0 + span
+    if isinstance(rooms, GridRooms):
+        grid = rooms.grid
+        ox, oy = rooms.offset
+        gx0, gy0, gx1, gy1 = x0 - ox, y0 - oy, x1 - ox, y1 - oy
+        types, masks = grid.types, grid.masks
+        if span * span <= len(grid):
+            # small window: scan its cells instead of every room
+            cells = ((gx, gy) for gy in range(max(gy0, grid.room_min_y), min(gy1, grid.room_max_y + 1))
+                     for gx in range(max(gx0, grid.room_min_x), min(gx1, grid.room_max_x + 1)))
+        else:
+            cells = ((gx, gy) for gx, gy in zip(grid.xs, grid.ys) if gx0 <= gx < gx1 and gy0 <= gy < gy1)
+        for gx, gy in cells:
+            cell = grid.index(gx, gy)
+            code = types[cell]
+            if not code:
+                continue
+            mask = masks[cell]
+            x, y = gx + ox, gy + oy
+            links = []
+            if mask & 1:
+                links.append((x + 1, y))
+            if mask & 2:
+                links.append((x, y + 1))
+            if mask & 4 and x == x0:
+                links.append((x - 1, y))
+            if mask & 8 and y == y0:
+                links.append((x, y - 1))
+            found.append((x, y, ROOM_TYPES[code - 1], links))
+    else:
+        for (x, y), room in rooms.items():
+            if x0 <= x < x1 and y0 <= y < y1:
+                links = [(cx, cy) for cx, cy in room.connections
+                         if (cx, cy) > (x, y) or not (x0 <= cx < x1 and y0 <= cy < y1)]
+                found.append((x, y, room.type, links))
+    return found
+
+def _svg_tile(visualizer: DungeonVisualizer, cells, x0: int, y0: int, span: int, detail: bool) -> bytes:
+    cell_size = visualizer.cell_size
+    size = span * cell_size
+    out = io.StringIO()
+    write = out.write
+    write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{TILE_PIXELS}" height="{TILE_PIXELS}" '
+          f'viewBox="{x0 * cell_size} {y0 * cell_size} {size} {size}">')
+    if detail:
+        write(visualizer.style_svg())
+    else:
+        # glyphs: square rooms without labels, and connections thick enough to see
+        write(f'<style>.dg-c{{stroke:{visualizer.connection_color};stroke-width:{cell_size // 5};fill:none}}')
+        for room_type, color in visualizer.colors.items():
+            write(f'.dg-{room_type}{{fill:{color}}}')
+        write('</style>')
+    write(f'<rect x="{x0 * cell_size}" y="{y0 * cell_size}" width="{size}" height="{size}" fill="{BACKGROUND_COLOR}"/>')
+
+    segments = [visualizer.connection_svg((x, y), link) for x, y, _, links in cells for link in links]
+    if segments:
+        write(f'<path class="dg-c" d="{"".join(segments)}"/>')
+    if detail:
+        for x, y, room_type, _ in cells:
+            write(visualizer.room_svg(x, y, room_type))
+    else:
+        inset = cell_size // 5
+        side = cell_size - 2 * inset
+        for x, y, room_type, _ in cells:
+            write(f'<rect class="dg-{room_type}" x="{x * cell_size + inset}" y="{y * cell_size + inset}" '
+                  f'width="{side}" height="{side}"/>')
+    write('</svg>')
+    return out.getvalue().encode("utf-8")
+
+def _raster_tile(visualizer: DungeonVisualizer, cells, x0: int, y0: int, span: int) -> bytes:
+    pixels = bytearray(TILE_PIXELS * TILE_PIXELS)
+    connection = RASTER_INDEX['connection']
+    if TILE_PIXELS >= 2 * span:
+        # a block per cell: the room in its corner, its east and south links next to it
+        block = TILE_PIXELS // span
+        side = block - 1
+        for x, y, room_type, links in cells:
+            px, py = (x - x0) * block, (y - y0) * block
+            index = RASTER_INDEX[room_type]
+            for row in range(py, py + side):
+                pixels[row * TILE_PIXELS + px:row * TILE_PIXELS + px + side] = bytes((index,)) * side
+            for cx, cy in links:
+                if cx == x + 1:
+                    pixels[(py + side // 2) * TILE_PIXELS + px + side] = connection
+                elif cy == y + 1:
+                    pixels[(py + side) * TILE_PIXELS + px + side // 2] = connection
+    else:
+        # several cells per pixel: keep the most important room type
+        for x, y, room_type, _ in cells:
+            offset = ((y - y0) * TILE_PIXELS // span) * TILE_PIXELS + (x - x0) * TILE_PIXELS // span
+            index = RASTER_INDEX[room_type]
+            if pixels[offset] < index:
+                pixels[offset] = index
+
+    colors = dict(visualizer.colors, background=BACKGROUND_COLOR, connection=visualizer.connection_color)
+    palette = b"".join(bytes.fromhex(colors[name][1:]) for name in RASTER_ORDER)
+    return encode_png(TILE_PIXELS, TILE_PIXELS, palette, pixels)
+
+def encode_png(width: int, height: int, palette: bytes, pixels: bytearray) -> bytes:
+    """8-bit palette PNG from one palette index per pixel, with zlib only"""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    # filter type 0 (none) in front of every row
+    raw = b"".join(b"\x00" + pixels[row * width:(row + 1) * width] for row in range(height))
+    return (PNG_SIGNATURE
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 3, 0, 0, 0))
+            + chunk(b"PLTE", palette)
+            + chunk(b"IDAT", zlib.compress(raw, 6))
+            + chunk(b"IEND", b""))
+
+def render_tile(rooms: Mapping, z: int, x: int, y: int, cell_size: int = 50) -> Tuple[bytes, str]:
+    """One tile as (body, media type): SVG at the closer zoom levels, PNG further out"""
+    span = tile_span(z)
+    x0, y0 = x * span, y * span
+    cells = tile_rooms(rooms, x0, y0, span)
+    visualizer = DungeonVisualizer(cell_size=cell_size)
+    lod = tile_lod(z)
+    if lod == "raster":
+        return _raster_tile(visualizer, cells, x0, y0, span), "image/png"
+    return _svg_tile(visualizer, cells, x0, y0, span, lod == "detail"), "image/svg+xml"
+
+def tile_info(rooms: Mapping) -> Dict:
+    """Bounds of the dungeon and the deepest zoom at which one tile shows all of it"""
+    if isinstance(rooms, GridRooms):
+        grid = rooms.grid
+        ox, oy = rooms.offset
+        min_x, min_y = grid.room_min_x + ox, grid.room_min_y + oy
+        max_x, max_y = grid.room_max_x + ox, grid.room_max_y + oy
+    else:
+        min_x, min_y = min(x for x, _ in rooms), min(y for _, y in rooms)
+        max_x, max_y = max(x for x, _ in rooms), max(y for _, y in rooms)
+
+    fit_zoom = 0
+    for z in range(MAX_ZOOM, -1, -1):
+        span = tile_span(z)
+        if min_x // span == max_x // span and min_y // span == max_y // span:
+            fit_zoom = z
+            break
+    return {
+        "tileSize": TILE_PIXELS,
+        "tileCells": TILE_CELLS,
+        "maxZoom": MAX_ZOOM,
+        "fitZoom": fit_zoom,
+        "fitTile": [min_x // tile_span(fit_zoom), min_y // tile_span(fit_zoom)],
+        "bounds": {"minX": min_x, "minY": min_y, "maxX": max_x, "maxY": max_y},
+        "levels": [tile_lod(z) for z in range(MAX_ZOOM + 1)]
+    }
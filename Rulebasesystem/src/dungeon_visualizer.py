@@ -1,6 +1,8 @@
-import svgwrite
-from typing import Dict, Tuple, Union
+import io
+from typing import Dict, Iterator, List, Tuple, Union, Mapping
 from .dungeon_lsystem import Room
+from .dungeon_grid import GridRooms, ROOM_TYPES
+from .dungeon_metrics import stage
 
 class DungeonVisualizer:
     def __init__(self, cell_size: int = 50):
@@ -20,10 +22,15 @@ class DungeonVisualizer:
         }
         self.connection_color = '#616161'
         
-    def _normalize_coordinates(self, rooms: Dict[Tuple[int, int], Room]) -> Tuple[Dict[Tuple[int, int], Room], int, int]:
+    def _normalize_coordinates(self, rooms: Mapping[Tuple[int, int], Room]) -> Tuple[Mapping[Tuple[int, int], Room], int, int]:
         """Normalize room coordinates to start from (0,0)"""
         if not rooms:
             return rooms, 0, 0
+
+        # Grid layouts only need a shifted view
+        if isinstance(rooms, GridRooms):
+            width, height = rooms.grid.size()
+            return rooms.grid.normalized(), width, height
             
         min_x = min(x for x, _ in rooms.keys())
         min_y = min(y for _, y in rooms.keys())
@@ -40,9 +47,123 @@ class DungeonVisualizer:
         
         return normalized_rooms, max_x + 1, max_y + 1
 
-    def create_svg(self, rooms: Dict[Tuple[int, int], Room], filename: str = None, 
+    def _room_cells(self, rooms: Mapping[Tuple[int, int], Room]) -> Iterator[Tuple[int, int, str, List[Tuple[int, int]]]]:
+        """Yield (x, y, type, connections to draw) per room; each connection appears once"""
+        if isinstance(rooms, GridRooms):
+            # read the arrays directly: a connection is drawn from its west/north end
+            grid = rooms.grid
+            ox, oy = rooms.offset
+            for gx, gy in zip(grid.xs, grid.ys):
+                cell = grid.index(gx, gy)
+                mask = grid.masks[cell]
+                x, y = gx + ox, gy + oy
+                links = []
+                if mask & 1:
+                    links.append((x + 1, y))
+                if mask & 2:
+                    links.append((x, y + 1))
+                yield x, y, ROOM_TYPES[grid.types[cell] - 1], links
+        else:
+            for (x, y), room in rooms.items():
+                yield x, y, room.type, [conn for conn in room.connections if conn > (x, y)]
+
+    def render_svg(self, rooms: Mapping[Tuple[int, int], Room], compact: bool = False,
+                   return_normalized: bool = False) -> Union[str, Tuple[str, Mapping]]:
+        """Write the SVG text directly into a string buffer.
+
+        Draws the same picture as create_svg without svgwrite: styling lives in
+        shared CSS classes and all connections share one <path>. With `compact`
+        each room is a <use> of a per-type symbol from <defs>; that is smallest,
+        but there are no <circle> elements for click handlers to find.
+        """
+        with stage("normalize"):
+            normalized_rooms, width, height = self._normalize_coordinates(rooms)
+        cell_size = self.cell_size
+        svg_width = (width + 1) * cell_size
+        svg_height = (height + 1) * cell_size
+        half = cell_size // 2 if cell_size % 2 == 0 else cell_size / 2
+        radius = cell_size // 3
+
+        out = io.StringIO()
+        write = out.write
+        write(f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+              f'width="{svg_width}" height="{svg_height}" viewBox="0 0 {svg_width} {svg_height}">')
+
+        # Shared styles
+        write(self.style_svg())
+
+        # One symbol per room type
+        if compact:
+            write('<defs>')
+            for room_type in self.colors:
+                write(f'<g id="dg-{room_type}"><circle class="dg-r dg-{room_type}" r="{radius}"/>')
+                if room_type in self.labels:
+                    write(f'<text class="dg-l">{self.labels[room_type]}</text>')
+                write('</g>')
+            write('</defs>')
+
+        # Add background
+        write(f'<rect width="{svg_width}" height="{svg_height}" fill="#424242"/>')
+
+        # Draw connections first
+        cells = list(self._room_cells(normalized_rooms))
+        segments = [
+            f'M{x * cell_size + half} {y * cell_size + half}L{cx * cell_size + half} {cy * cell_size + half}'
+            for x, y, _, links in cells
+            for cx, cy in links
+        ]
+        if segments:
+            write(f'<path class="dg-c" d="{"".join(segments)}"/>')
+
+        # Draw rooms
+        for x, y, room_type, _ in cells:
+            center_x = x * cell_size + half
+            center_y = y * cell_size + half
+            if compact:
+                write(f'<use xlink:href="#dg-{room_type}" x="{center_x}" y="{center_y}"/>')
+                continue
+            write(f'<circle class="dg-r dg-{room_type}" cx="{center_x}" cy="{center_y}" r="{radius}"/>')
+            if room_type != 'normal':
+                write(f'<text class="dg-l" x="{center_x}" y="{center_y}">{self.labels[room_type]}</text>')
+        write('</svg>')
+
+        if return_normalized:
+            return out.getvalue(), normalized_rooms
+        return out.getvalue()
+
+    def style_svg(self) -> str:
+        """The <style> element render_svg's CSS classes come from"""
+        types = "".join(f'.dg-{room_type}{{fill:{color}}}' for room_type, color in self.colors.items())
+        return (f'<style>.dg-c{{stroke:{self.connection_color};stroke-width:3;fill:none}}'
+                f'.dg-r{{stroke:white;stroke-width:2}}{types}'
+                f'.dg-l{{font-size:{self.cell_size // 4}px;font-family:Arial;fill:white;'
+                'text-anchor:middle;dominant-baseline:middle;pointer-events:none}</style>')
+
+    def room_svg(self, x: int, y: int, room_type: str, compact: bool = False) -> str:
+        """Markup render_svg draws for one room, for partial updates"""
+        cell_size = self.cell_size
+        half = cell_size // 2 if cell_size % 2 == 0 else cell_size / 2
+        center_x = x * cell_size + half
+        center_y = y * cell_size + half
+        if compact:
+            return f'<use xlink:href="#dg-{room_type}" x="{center_x}" y="{center_y}"/>'
+        svg = f'<circle class="dg-r dg-{room_type}" cx="{center_x}" cy="{center_y}" r="{cell_size // 3}"/>'
+        if room_type != 'normal':
+            svg += f'<text class="dg-l" x="{center_x}" y="{center_y}">{self.labels[room_type]}</text>'
+        return svg
+
+    def connection_svg(self, a: Tuple[int, int], b: Tuple[int, int]) -> str:
+        """Path data render_svg writes for one connection, drawn from its west/north end"""
+        (x, y), (cx, cy) = sorted((a, b))
+        cell_size = self.cell_size
+        half = cell_size // 2 if cell_size % 2 == 0 else cell_size / 2
+        return f'M{x * cell_size + half} {y * cell_size + half}L{cx * cell_size + half} {cy * cell_size + half}'
+
+    def create_svg(self, rooms: Mapping[Tuple[int, int], Room], filename: str = None, 
                   return_string: bool = False, return_normalized: bool = False) -> Union[str, Tuple[str, Dict]]:
-        """Create SVG visualization of the dungeon"""
+        """Create SVG visualization of the dungeon with svgwrite"""
+        import svgwrite  # optional; render_svg covers the API path without it
+
         # Normalize coordinates
         normalized_rooms, width, height = self._normalize_coordinates(rooms)
         
@@ -0,0 +1,59 @@
+import hashlib
+import os
+import time
+from typing import Dict, Optional
+
+from .dungeon_pipeline import BROTLI_AVAILABLE, compress_body, generate_session
+from .dungeon_snapshot import GOLDEN_CASES, case_output, install_snapshot
+
+def warm_up(snapshot: Optional[Dict] = None) -> Dict:
+    """Run every hot path once in this process, before it takes traffic.
+
+    Installs the rule snapshot (workers that are not forked from the API
+    process don't inherit it), replays the snapshot's seeded dungeons and
+    loads the modules the API only imports on demand. Returns the seconds
+    spent per path and the seeded cases whose output no longer matches.
+    """
+    seconds: Dict[str, float] = {}
+    mismatches = []
+
+    def timed(name: str, start: float) -> None:
+        seconds[name] = seconds.get(name, 0.0) + time.perf_counter() - start
+
+    if snapshot is not None:
+        start = time.perf_counter()
+        install_snapshot(snapshot)
+        timed("snapshot", start)
+        cases = snapshot["golden"]
+    else:
+        cases = [{"case": list(case)} for case in GOLDEN_CASES]
+
+    for entry in cases:
+        start = time.perf_counter()
+        body = case_output(entry["case"])
+        timed(entry["case"][0], start)
+        if "sha1" in entry and hashlib.sha1(body).hexdigest() != entry["sha1"]:
+            mismatches.append(entry["case"])
+
+    # lazy dungeons: rooms, rerolls and tiles run in the API process itself
+    from .dungeon_edit import reroll_branch
+    from .dungeon_tiles import MAX_ZOOM, render_tile, tile_info, tile_span
+    start = time.perf_counter()
+    _, session = generate_session(0, 4, 50)
+    x, y = session.entrance_pos
+    session.describe_room((x, y))
+    tile_info(session.rooms)
+    for z in (MAX_ZOOM, MAX_ZOOM - 2, 0):  # detail, glyph and raster tiles
+        span = tile_span(z)
+        render_tile(session.rooms, z, x // span, y // span, session.cell_size)
+    reroll_branch(session, next(pos for pos in session.rooms if pos != session.entrance_pos), seed=0)
+    timed("session", start)
+
+    start = time.perf_counter()
+    body = case_output(GOLDEN_CASES[0])
+    compress_body(body, "gzip")
+    if BROTLI_AVAILABLE:
+        compress_body(body, "br")
+    timed("compress", start)
+
+    return {"pid": os.getpid(), "seconds": seconds, "mismatches": mismatches}